@@ -0,0 +1,71 @@
+"""Общие части админки для больших таблиц.
+
+EstimatedCountPaginator не считает COUNT(*) по всей таблице, а берёт
+оценку планировщика PostgreSQL. FullTextSearchMixin ищет по текстовому
+индексу PostgreSQL вместо icontains; на других СУБД поиск обычный.
+"""
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Меньше этого числа строк оценке не верим и считаем точно
+ESTIMATE_THRESHOLD = 10000
+SEARCH_CONFIG = 'russian'
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            estimate = estimated_count(
+                self.object_list.model, self.object_list.db
+            )
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+
+def estimated_count(model, alias):
+    """Оценка числа строк таблицы по статистике или None."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class FullTextSearchMixin:
+    """Полнотекстовый поиск по полям из search_fields.
+
+    Выражение совпадает с индексом to_tsvector('russian', ...) из
+    миграций, поэтому PostgreSQL ищет по GIN-индексу, а не сканирует
+    таблицу.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or (
+            connections[queryset.db].vendor != 'postgresql'
+        ):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        queryset = queryset.annotate(
+            search=SearchVector(*self.search_fields, config=SEARCH_CONFIG)
+        ).filter(search=SearchQuery(search_term, config=SEARCH_CONFIG))
+        return queryset, False
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """Админка без точных COUNT(*) по большим таблицам."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
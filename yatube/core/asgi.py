@@ -0,0 +1,164 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+В Django 2.2 нет ни ASGI-обработчика, ни асинхронных view, поэтому
+view, включая ленты posts, выполняются как есть, но в ограниченном пуле
+ASGI_THREADS потоков. Чтение тела от медленного клиента идёт в цикле
+событий и потока не занимает, как и отправка обычного ответа: он уже
+собран в памяти и закрыт.
+
+View, чтение потокового ответа (медиа, выгрузки) и его close() идут в
+одном потоке, как в WSGI-сервере: request_finished закрывает соединения
+с базой того потока, где их открыл view. Поэтому потоковый ответ держит
+свой поток, пока не отправлен весь.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ из ASGI scope: строки в latin-1, как требует PEP 3333."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = raw_value.decode('latin-1')
+        if name in environ:
+            value = environ[name] + ',' + value
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application=None, max_threads=None):
+        self.wsgi_application = wsgi_application or WSGIHandler()
+        self.max_threads = max_threads or settings.ASGI_THREADS
+        self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип {scope["type"]}')
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_threads)
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        try:
+            await self.respond(wsgi_environ(scope, body), send)
+        finally:
+            body.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса; большое уходит на диск. None — клиент ушёл."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def handle(self, environ, loop, send):
+        """Весь запрос в одном потоке пула: view, куски ответа и close().
+
+        Куски потокового ответа отправляются отсюда же через цикл событий.
+        Обычный ответ возвращается (статус, заголовки, куски) для отправки
+        из цикла; для потокового возвращается None.
+        """
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        def wait(coroutine):
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        response = self.wsgi_application(environ, start_response)
+        try:
+            if not getattr(response, 'streaming', False):
+                return (*started, list(response))
+            wait(send_start(send, *started))
+            for chunk in response:
+                wait(send_chunk(send, chunk))
+            return None
+        finally:
+            # Закрытие ответа шлёт request_finished и закрывает соединения
+            response.close()
+
+    async def respond(self, environ, send):
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self.executor, self.handle, environ, loop, send
+        )
+        if result is not None:
+            status, headers, chunks = result
+            await send_start(send, status, headers)
+            for chunk in chunks:
+                await send_chunk(send, chunk)
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def send_start(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ],
+    })
+
+
+async def send_chunk(send, chunk):
+    if chunk:
+        await send({
+            'type': 'http.response.body', 'body': chunk, 'more_body': True,
+        })
+
+
+def get_asgi_application():
+    import django
+
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,35 @@
+from contextlib import ExitStack
+from functools import wraps
+
+from django.db import connections
+
+from .middleware import stick_to_primary
+from .routers import use_primary
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def primary_db(view_func):
+    """Выполняет view на основной базе.
+
+    Сессия залипает на основной базе, только если view что-то записал и
+    ответил без ошибки: открытие формы или неверный POST реплику не
+    отключают.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        wrote = []
+
+        def track_writes(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+                wrote.append(True)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack, use_primary():
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(track_writes))
+            response = view_func(request, *args, **kwargs)
+        if wrote and response.status_code < 400:
+            stick_to_primary(request)
+        return response
+    return wrapper
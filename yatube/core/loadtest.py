@@ -0,0 +1,106 @@
+"""Нагрузочный прогон по HTTP против запущенного сервера.
+
+Виртуальные пользователи — потоки со своей сессией requests. Каждый в
+цикле выбирает сценарий по весам и выполняет его, пока не выйдет время
+ступени. Время и ошибки собираются по имени эндпоинта.
+"""
+import random
+import secrets
+import string
+import threading
+import time
+
+import requests
+
+CSRF_ALPHABET = string.ascii_letters + string.digits
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.errors = {}
+
+    def record(self, name, seconds, ok):
+        with self.lock:
+            self.timings.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed):
+        """Строки отчёта: запросы, ошибки, запр/с и перцентили в мс."""
+        rows = []
+        for name, timings in sorted(self.timings.items()):
+            rows.append((
+                name, len(timings), self.errors.get(name, 0),
+                len(timings) / elapsed,
+                *(percentile(timings, share) * 1000
+                  for share in (0.5, 0.95, 0.99)),
+                max(timings) * 1000,
+            ))
+        return rows
+
+
+class VirtualUser:
+    """HTTP-клиент одного пользователя: куки сессии и CSRF."""
+
+    def __init__(self, base_url, stats, session_key=None, context=None):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.context = context or {}
+        self.http = requests.Session()
+        # Django принимает и 32-символьный секрет в куке и заголовке
+        self.csrf = ''.join(secrets.choice(CSRF_ALPHABET) for _ in range(32))
+        self.http.cookies.set('csrftoken', self.csrf)
+        self.http.headers['X-CSRFToken'] = self.csrf
+        self.authenticated = session_key is not None
+        if session_key is not None:
+            self.http.cookies.set('sessionid', session_key)
+
+    def request(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(
+                method, self.base_url + path, allow_redirects=False,
+                timeout=30, **kwargs
+            )
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.stats.record(name, time.perf_counter() - started, ok)
+        return response
+
+    def get(self, name, path, **kwargs):
+        return self.request(name, 'GET', path, **kwargs)
+
+    def post(self, name, path, **kwargs):
+        return self.request(name, 'POST', path, **kwargs)
+
+
+def run_stage(users, duration, scenarios):
+    """Гоняет сценарии [(вес, функция, нужен ли вход)] duration секунд."""
+    deadline = time.monotonic() + duration
+
+    def loop(user):
+        available = [
+            (weight, scenario)
+            for weight, scenario, needs_login in scenarios
+            if user.authenticated or not needs_login
+        ]
+        weights = [weight for weight, _ in available]
+        functions = [scenario for _, scenario in available]
+        while time.monotonic() < deadline:
+            random.choices(functions, weights)[0](user)
+
+    threads = [threading.Thread(target=loop, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
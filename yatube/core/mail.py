@@ -0,0 +1,117 @@
+"""Очередь исходящих писем.
+
+OutboxEmailBackend только сохраняет письма в таблицу, поэтому запрос
+(например, сброс пароля) не ждёт почтовый сервер, и ставит фоновую
+задачу deliver_outbox. Она и команда send_mail_queue отправляют письма
+пачками через OUTBOX_EMAIL_BACKEND по одному соединению, повторяя
+неудачные попытки с растущей паузой.
+"""
+import base64
+import datetime as dt
+import pickle
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .tasks import task
+
+
+def dump_message(message):
+    message.connection = None
+    return base64.b64encode(pickle.dumps(message)).decode('ascii')
+
+
+def load_message(data):
+    return pickle.loads(base64.b64decode(data))
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        OutboxMessage.objects.bulk_create(
+            OutboxMessage(data=dump_message(message))
+            for message in email_messages
+        )
+        deliver_outbox.delay()
+        return len(email_messages)
+
+
+def retry_delay(attempts):
+    return dt.timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** attempts)
+
+
+def claim_batch(batch_size):
+    """Берёт пачку писем, которым пора уходить, и откладывает их.
+
+    Захват — UPDATE с условием на прежний next_attempt, как у задач в
+    core.tasks: он атомарен и в SQLite, где select_for_update не
+    работает, поэтому два воркера не отправят одно письмо. Отложенные на
+    OUTBOX_CLAIM_TIMEOUT письма вернутся в очередь сами, если воркер
+    упадёт.
+    """
+    now = timezone.now()
+    lease = now + dt.timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+    candidates = OutboxMessage.objects.filter(
+        next_attempt__lte=now,
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    ).values_list('pk', 'next_attempt')[:batch_size]
+    claimed = [
+        pk for pk, next_attempt in candidates
+        if OutboxMessage.objects.filter(
+            pk=pk, next_attempt=next_attempt
+        ).update(next_attempt=lease)
+    ]
+    return list(OutboxMessage.objects.filter(pk__in=claimed))
+
+
+def _fail(queued, error):
+    queued.attempts += 1
+    queued.last_error = repr(error)
+    queued.next_attempt = timezone.now() + retry_delay(queued.attempts)
+
+
+def send_queued(batch_size=100):
+    """Отправляет одну пачку. Возвращает (отправлено, с ошибкой)."""
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        # Сервер недоступен: попытка засчитывается всем письмам пачки,
+        # иначе они повторялись бы без счёта
+        for queued in batch:
+            _fail(queued, error)
+        failed = batch
+    else:
+        try:
+            for queued in batch:
+                try:
+                    connection.send_messages([load_message(queued.data)])
+                except Exception as error:
+                    _fail(queued, error)
+                    failed.append(queued)
+                else:
+                    sent.append(queued.pk)
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                # Письма уже ушли: ошибка закрытия не повод слать их снова
+                pass
+    OutboxMessage.objects.filter(pk__in=sent).delete()
+    OutboxMessage.objects.bulk_update(
+        failed, ('attempts', 'last_error', 'next_attempt')
+    )
+    return len(sent), len(failed)
+
+
+@task
+def deliver_outbox():
+    """Отправляет пачки, пока в очереди есть письма, которым пора уйти."""
+    while any(send_queued()):
+        pass
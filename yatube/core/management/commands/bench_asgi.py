@@ -0,0 +1,115 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from core.asgi import ASGIHandler, wsgi_environ
+from core.loadtest import percentile
+
+
+def http_scope(path):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI и ASGI при медленных клиентах: одинаковое число '
+        'потоков, одинаковая нагрузка'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help='Адрес запросов')
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Сколько запросов отправить'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Сколько клиентов одновременно'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='WSGI-воркеров и потоков пула ASGI'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Сколько секунд клиент читает каждый кусок ответа'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        wsgi = WSGIHandler()
+        for name, serve in (
+            ('WSGI', self.wsgi_client(wsgi)),
+            ('ASGI', self.asgi_client(ASGIHandler(wsgi, options['threads']))),
+        ):
+            started = time.perf_counter()
+            timings = asyncio.run(self.load(serve))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {len(timings) / elapsed:7.1f} запр/с, '
+                f'p50 {percentile(timings, 0.5) * 1000:7.1f} мс, '
+                f'p95 {percentile(timings, 0.95) * 1000:7.1f} мс, '
+                f'max {max(timings) * 1000:7.1f} мс'
+            )
+
+    async def load(self, serve):
+        slots = asyncio.Semaphore(self.options['concurrency'])
+
+        async def client():
+            async with slots:
+                started = time.perf_counter()
+                await serve()
+                return time.perf_counter() - started
+
+        return await asyncio.gather(
+            *(client() for _ in range(self.options['requests']))
+        )
+
+    def wsgi_client(self, application):
+        """Синхронный воркер занят, пока медленный клиент читает ответ."""
+        executor = ThreadPoolExecutor(self.options['threads'])
+        scope = http_scope(self.options['path'])
+        delay = self.options['client_delay']
+
+        def worker():
+            environ = wsgi_environ(scope, BytesIO())
+            response = application(environ, lambda status, headers: None)
+            try:
+                for _ in response:
+                    time.sleep(delay)
+            finally:
+                response.close()
+
+        async def serve():
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(executor, worker)
+
+        return serve
+
+    def asgi_client(self, application):
+        """ASGI ждёт медленного клиента в цикле событий, без потока."""
+        scope = http_scope(self.options['path'])
+        delay = self.options['client_delay']
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message.get('more_body'):
+                await asyncio.sleep(delay)
+
+        async def serve():
+            await application(scope, receive, send)
+
+        return serve
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import STAGES, benchmark, run_boot
+
+
+class Command(BaseCommand):
+    help = 'Замеряет холодный старт и время импорта модулей по этапам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Сколько холодных стартов замерить'
+        )
+        parser.add_argument(
+            '--path', default='/',
+            help='Адрес первого запроса'
+        )
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help='Сколько самых долгих импортов показать на этап'
+        )
+        parser.add_argument(
+            '--tree', action='store_true',
+            help='Показать дерево импортов в стиле -X importtime'
+        )
+        parser.add_argument(
+            '--min-ms', type=float, default=1,
+            help='Не показывать в дереве импорты быстрее стольких мс'
+        )
+
+    def handle(self, *args, **options):
+        report = run_boot(options['path'], importtime=True)
+        self.stdout.write(f'Первый запрос: {report["status"]}')
+        for stage in STAGES:
+            imports = report['imports'][stage]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{stage}: импортов {len(imports)}'
+            ))
+            if options['tree']:
+                self.write_tree(imports, options['min_ms'])
+            else:
+                self.write_top(imports, options['top'])
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Холодный старт, {options["runs"]} запусков (мин / медиана):'
+        ))
+        for stage, (fastest, median) in benchmark(
+            options['runs'], options['path']
+        ).items():
+            self.stdout.write(
+                f'{stage:>8}: {fastest * 1000:8.1f} / {median * 1000:8.1f} мс'
+            )
+
+    def write_top(self, imports, top):
+        # Верхний уровень этапа: его время включает вложенные импорты
+        depth = min((record[0] for record in imports), default=0)
+        outer = [record for record in imports if record[0] == depth]
+        outer.sort(key=lambda record: record[2], reverse=True)
+        for _, _, total, module in outer[:top]:
+            self.stdout.write(f'{total / 1000:8.1f} мс  {module}')
+
+    def write_tree(self, imports, min_ms):
+        for depth, own, total, module in imports:
+            if total >= min_ms * 1000:
+                self.stdout.write(
+                    f'{own / 1000:8.1f} | {total / 1000:8.1f} | '
+                    f'{"  " * depth}{module}'
+                )
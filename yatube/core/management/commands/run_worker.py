@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import run_pending, stats
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Размер пула потоков'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько задач захватывать за раз'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза между опросами пустой очереди, секунд'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти'
+        )
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(options['threads']) as executor:
+            try:
+                self.loop(executor, options)
+            except KeyboardInterrupt:
+                pass
+        for line in stats.report():
+            self.stdout.write(line)
+
+    def loop(self, executor, options):
+        while True:
+            done, failed = run_pending(options['batch_size'], executor)
+            if done or failed:
+                self.stdout.write(f'Выполнено {done}, с ошибкой {failed}')
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['interval'])
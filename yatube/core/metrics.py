@@ -0,0 +1,232 @@
+"""Метрики в формате Prometheus: счётчики и гистограммы.
+
+Запись идёт в словарь текущего потока, поэтому на горячем пути нет
+блокировок; сводятся словари только при выдаче /metrics. Когда поток
+завершается, его словарь вливается в общий итог процесса, так что
+сервер с потоком на запрос не копит словари. Если задан
+METRICS_DIR, каждый процесс раз в METRICS_FLUSH_INTERVAL секунд
+сбрасывает свой снимок в METRICS_DIR/<pid>.json, а /metrics суммирует
+файлы всех воркеров. Файлы завершившихся процессов остаются, как и их
+вклад в счётчики.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+registry = {}
+_local = threading.local()
+# Словари живых потоков по id и итог завершившихся
+_shards = {}
+_retired = {}
+# RLock: финализатор может сработать при сборке мусора под этим же замком
+_shards_lock = threading.RLock()
+_flush_lock = threading.Lock()
+_next_flush = 0
+
+
+class _Owner:
+    """Живёт в threading.local и умирает вместе с потоком."""
+
+
+def _merge_into(total, values):
+    for key, value in values.items():
+        metric = registry.get(key[0])
+        if metric is not None:
+            total[key] = metric.merge(total.get(key), value)
+
+
+def _retire(values):
+    with _shards_lock:
+        _shards.pop(id(values), None)
+        _merge_into(_retired, values)
+
+
+def _shard():
+    """Словарь значений текущего потока."""
+    try:
+        return _local.values
+    except AttributeError:
+        values = _local.values = {}
+        _local.owner = _Owner()
+        weakref.finalize(_local.owner, _retire, values)
+        with _shards_lock:
+            _shards[id(values)] = values
+        return values
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry[name] = self
+
+    def key(self, labels):
+        values = tuple(str(labels[name]) for name in self.labelnames)
+        return self.name, values
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        values = _shard()
+        key = self.key(labels)
+        values[key] = values.get(key, 0) + amount
+
+    def merge(self, total, value):
+        return (total or 0) + value
+
+    def samples(self, labels, value):
+        yield self.name, labels, value
+
+
+class Histogram(Metric):
+    """Хранит число наблюдений по корзинам, сумму и общее число."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        values = _shard()
+        key = self.key(labels)
+        state = values.get(key)
+        if state is None:
+            # Корзины, затем +Inf, сумма
+            state = values[key] = [0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [left + right for left, right in zip(total, value)]
+
+    def samples(self, labels, value):
+        cumulative = 0
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, value):
+            cumulative += count
+            yield self.name + '_bucket', labels + (('le', bound),), cumulative
+        yield self.name + '_sum', labels, value[-1]
+        yield self.name + '_count', labels, cumulative
+
+
+def snapshot():
+    """Значения этого процесса: {(метрика, метки): значение}."""
+    merged = {}
+    with _shards_lock:
+        shards = list(_shards.values())
+        _merge_into(merged, _retired)
+    for shard in shards:
+        _merge_into(merged, dict(shard))
+    return merged
+
+
+def _snapshot_path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def flush():
+    """Сбрасывает снимок процесса в METRICS_DIR атомарной заменой файла."""
+    global _next_flush
+    _next_flush = time.monotonic() + settings.METRICS_FLUSH_INTERVAL
+    path = _snapshot_path(os.getpid())
+    temporary = f'{path}.tmp'
+    # Потоки процесса пишут один и тот же временный файл
+    with _flush_lock:
+        with open(temporary, 'w') as file:
+            json.dump([
+                [name, list(labels), value]
+                for (name, labels), value in snapshot().items()
+            ], file)
+        os.replace(temporary, path)
+
+
+def maybe_flush():
+    """Дешёвая проверка для каждого запроса: пора ли сбросить снимок."""
+    if settings.METRICS_DIR and time.monotonic() >= _next_flush:
+        flush()
+
+
+def collect():
+    """Значения всех процессов, если задан METRICS_DIR, иначе этого."""
+    if not settings.METRICS_DIR:
+        return snapshot()
+    flush()
+    merged = {}
+    for entry in os.scandir(settings.METRICS_DIR):
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            with open(entry.path) as file:
+                rows = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in rows:
+            metric = registry.get(name)
+            if metric is not None:
+                key = (name, tuple(labels))
+                merged[key] = metric.merge(merged.get(key), value)
+    return merged
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    )
+
+
+def exposition():
+    """Текст в формате Prometheus text exposition 0.0.4."""
+    by_metric = {}
+    for (name, labels), value in collect().items():
+        by_metric.setdefault(name, []).append((labels, value))
+    lines = []
+    for name in sorted(by_metric):
+        metric = registry[name]
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for values, value in sorted(by_metric[name]):
+            labels = tuple(zip(metric.labelnames, values))
+            for sample, sample_labels, number in metric.samples(
+                labels, value
+            ):
+                rendered = ','.join(
+                    f'{label}="{escape(text)}"'
+                    for label, text in sample_labels
+                )
+                if rendered:
+                    sample = f'{sample}{{{rendered}}}'
+                lines.append(f'{sample} {number}')
+    return '\n'.join(lines) + '\n'
+
+
+@atexit.register
+def _flush_at_exit():
+    if (_shards or _retired) and getattr(settings, 'METRICS_DIR', None):
+        flush()
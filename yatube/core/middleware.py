@@ -0,0 +1,322 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import has_vary_header, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics
+from .routers import get_replicas, use_primary
+from .storage import brotli
+
+STICKY_SESSION_KEY = '_primary_db_until'
+
+
+def stick_to_primary(request):
+    """Закрепляет чтение за основной базой на REPLICA_STICKY_SECONDS."""
+    if get_replicas() and hasattr(request, 'session'):
+        request.session[STICKY_SESSION_KEY] = (
+            time.time() + settings.REPLICA_STICKY_SECONDS
+        )
+
+
+class PrimaryStickinessMiddleware:
+    """Пока не истёк срок залипания, сессия читает с основной базы.
+
+    Так автор сразу видит свой новый пост, даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+        pinned_until = request.session.get(STICKY_SESSION_KEY, 0)
+        if time.time() >= pinned_until:
+            return self.get_response(request)
+        with use_primary():
+            return self.get_response(request)
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=60'
+# Порядок важен: при поддержке обоих кодировок отдаём более плотный br
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.mtime = stat.st_mtime
+        self.size = stat.st_size
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        )
+        self.variants = [
+            (encoding, path + suffix) for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        ]
+
+    def negotiate(self, accept_encoding):
+        accepted = {
+            token.split(';')[0].strip() for token in accept_encoding.split(',')
+            if not token.replace(' ', '').endswith(';q=0')
+        }
+        for encoding, path in self.variants:
+            if encoding in accepted:
+                return encoding, path
+        return None, self.path
+
+    def response(self, request):
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), self.mtime, self.size
+        ):
+            return HttpResponseNotModified()
+        encoding, path = self.negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        # FileResponse отдаёт файл через wsgi.file_wrapper, то есть sendfile
+        response = FileResponse(open(path, 'rb'))
+        response['Content-Type'] = self.content_type
+        response['Cache-Control'] = self.cache_control
+        response['Last-Modified'] = http_date(self.mtime)
+        if self.variants:
+            response['Vary'] = 'Accept-Encoding'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
+
+
+def scan_static_root(root):
+    """Индекс собранной статики: имя -> StaticFile, строится один раз."""
+    manifest_path = os.path.join(root, 'staticfiles.json')
+    hashed_names = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest:
+            hashed_names = set(json.load(manifest)['paths'].values())
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            files[name] = StaticFile(path, name in hashed_names)
+    return files
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику до сессий, авторизации и view.
+
+    Хэшированные имена кэшируются навсегда, для сжатых копий из
+    CompressedManifestStaticFilesStorage учитывается Accept-Encoding.
+    Если статика не собрана, middleware отключается целиком.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        root = settings.STATIC_ROOT
+        self.files = scan_static_root(root) if root else {}
+        if not self.files:
+            raise MiddlewareNotUsed
+        self.prefix = settings.STATIC_URL
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            static_file = self.files.get(request.path_info[len(self.prefix):])
+            if static_file is not None:
+                return static_file.response(request)
+        return self.get_response(request)
+
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+# Блоки, внутри которых пробелы значимы
+RAW_BLOCKS_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.S | re.I
+)
+NEWLINE_SPACE_RE = re.compile(r'[ \t\r]*\n\s*')
+
+
+def minify_html(html):
+    """Схлопывает пробельные строки, оставляя по одному переводу строки.
+
+    Браузер всё равно сводит такие пробелы к одному, поэтому разметка
+    не меняется; содержимое pre, textarea, script и style не трогаем.
+    """
+    parts = RAW_BLOCKS_RE.split(html)
+    # split отдаёт тройки: текст, блок целиком, имя тега
+    for index in range(0, len(parts), 3):
+        parts[index] = NEWLINE_SPACE_RE.sub('\n', parts[index])
+    return ''.join(
+        part for index, part in enumerate(parts) if index % 3 != 2
+    )
+
+
+def accepted_encoding(request):
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = {
+        token.split(';')[0].strip() for token in accept.split(',')
+        if not token.replace(' ', '').endswith(';q=0')
+    }
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(encoding, data):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BR_QUALITY)
+    return gzip.compress(
+        data, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+    )
+
+
+def is_shared(request, response):
+    """Одинаков ли ответ для всех: только такие тела есть смысл кэшировать.
+
+    Ответы пользователя с сессией, с Vary: Cookie, Set-Cookie или
+    private каждый раз разные и только вытеснили бы из кэша полезное.
+    """
+    cache_control = response.get('Cache-Control', '')
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not has_vary_header(response, 'Cookie')
+        and not response.cookies
+        and 'private' not in cache_control
+        and 'no-store' not in cache_control
+    )
+
+
+def compress_cached(encoding, data):
+    """Сжимает тело один раз: результат кэшируется по хэшу содержимого.
+
+    Общие для всех страницы байт в байт одинаковы, поэтому каждый
+    следующий запрос берёт уже сжатое тело вместо повторного сжатия.
+    Кэш отдельный (COMPRESSION_CACHE), чтобы не вытеснять сессии и
+    карточки постов.
+    """
+    compressed_bodies = caches[settings.COMPRESSION_CACHE]
+    key = 'compressed:{}:{}'.format(encoding, hashlib.md5(data).hexdigest())
+    compressed = compressed_bodies.get(key)
+    if compressed is None:
+        compressed = compress(encoding, data)
+        compressed_bodies.set(
+            key, compressed, settings.COMPRESSION_CACHE_TIMEOUT
+        )
+    return compressed
+
+
+class CompressionMiddleware:
+    """Минифицирует HTML и сжимает ответы в br или gzip.
+
+    Пропускает потоковые, уже сжатые и слишком маленькие ответы. Стоит
+    ставить под UpdateCacheMiddleware: тогда в кэш страниц попадает уже
+    сжатый ответ с Vary: Accept-Encoding.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(
+                COMPRESSIBLE_TYPES
+            )
+        ):
+            return response
+        if (
+            settings.HTML_MINIFY
+            and response['Content-Type'].startswith('text/html')
+        ):
+            response.content = minify_html(
+                response.content.decode(response.charset)
+            ).encode(response.charset)
+            response['Content-Length'] = str(len(response.content))
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request)
+        if encoding is None:
+            return response
+        if is_shared(request, response):
+            compressed = compress_cached(encoding, response.content)
+        else:
+            compressed = compress(encoding, response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^(W/)?', 'W/', response['ETag'])
+        return response
+
+
+REQUEST_LATENCY = metrics.Histogram(
+    'http_request_duration_seconds', 'Время ответа по имени URL', ('view',)
+)
+REQUESTS = metrics.Counter(
+    'http_requests_total', 'Ответы по имени URL и статусу', ('view', 'status')
+)
+DB_QUERIES = metrics.Histogram(
+    'db_queries_per_request', 'Запросов к базе на один ответ', ('view',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+
+class MetricsMiddleware:
+    """Время ответа, статус и число запросов к базе по имени URL.
+
+    Стоит первым, чтобы время включало все остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(None)
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match is not None else ''
+        REQUEST_LATENCY.observe(elapsed, view=view)
+        REQUESTS.inc(view=view, status=response.status_code)
+        DB_QUERIES.observe(len(queries), view=view)
+        metrics.maybe_flush()
+        return response
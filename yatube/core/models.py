@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """Письмо в очереди на отправку (см. core.mail)."""
+    data = models.TextField('Письмо в base64(pickle)')
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('next_attempt',)
+        verbose_name = 'письмо в очереди'
+        verbose_name_plural = 'очередь писем'
+
+
+class Task(models.Model):
+    """Отложенный вызов функции, помеченной @task (см. core.tasks)."""
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы в JSON')
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    run_at = models.DateTimeField(
+        'Запустить не раньше', default=timezone.now, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('run_at',)
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,116 @@
+"""Профилирование холодного старта: время импортов и этапов загрузки.
+
+Замер идёт в отдельном процессе: -X importtime пишет дерево импортов
+только с запуска интерпретатора, а в текущем процессе Django уже
+загружен. Дочерний процесс (python -m core.profiling) проходит этапы
+setup — django.setup(), wsgi — get_wsgi_application() и request —
+первый запрос, печатает их длительность в JSON, а в stderr отмечает
+границы этапов, чтобы разложить по ним вывод -X importtime.
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+from django.conf import settings
+
+STAGES = ('setup', 'wsgi', 'request')
+STAGE_MARK = '# stage: '
+IMPORT_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def first_request(application, path):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    statuses = []
+    body = application(
+        environ, lambda status, headers: statuses.append(status)
+    )
+    b''.join(body)
+    body.close()
+    return statuses[0]
+
+
+def boot(path):
+    """Этапы запуска в текущем, ещё «холодном» процессе."""
+    timings = {}
+
+    def stage(name):
+        sys.stderr.write(f'{STAGE_MARK}{name}\n')
+        sys.stderr.flush()
+        return time.perf_counter()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    started = stage('setup')
+    django.setup()
+    from django.core.wsgi import get_wsgi_application
+    timings['setup'], started = time.perf_counter() - started, stage('wsgi')
+    application = get_wsgi_application()
+    timings['wsgi'], started = time.perf_counter() - started, stage('request')
+    status = first_request(application, path)
+    timings['request'] = time.perf_counter() - started
+    return {'timings': timings, 'status': status}
+
+
+def parse_importtime(stderr):
+    """Строки -X importtime по этапам: (глубина, своё, всего мкс, модуль)."""
+    imports = {name: [] for name in STAGES}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith(STAGE_MARK):
+            current = line[len(STAGE_MARK):]
+            continue
+        match = IMPORT_RE.match(line)
+        if match and current in imports:
+            own, total, indent, module = match.groups()
+            imports[current].append(
+                (len(indent) // 2, int(own), int(total), module)
+            )
+    return imports
+
+
+def run_boot(path='/', importtime=False):
+    """Запускает холодный старт в дочернем процессе и разбирает итог."""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-m', 'core.profiling', path]
+    result = subprocess.run(
+        command, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.splitlines()[-1])
+    if importtime:
+        report['imports'] = parse_importtime(result.stderr)
+    return report
+
+
+def benchmark(runs, path='/'):
+    """Минимум и медиана каждого этапа за runs холодных стартов, в секундах."""
+    samples = [run_boot(path)['timings'] for _ in range(runs)]
+    return {
+        name: (
+            min(sample[name] for sample in samples),
+            statistics.median(sample[name] for sample in samples),
+        )
+        for name in STAGES
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(boot(sys.argv[1] if len(sys.argv) > 1 else '/')))
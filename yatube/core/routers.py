@@ -0,0 +1,89 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY_DB = 'default'
+# Сессии читаем только с основной базы: по ним определяется залипание.
+# Очереди core тоже: реплика может отдать уже отправленное письмо
+PRIMARY_ONLY_APPS = ('sessions', 'core')
+
+_state = threading.local()
+
+
+def primary_pinned():
+    """Возвращает True, если чтение в текущем потоке закреплено за primary."""
+    return getattr(_state, 'pinned', False)
+
+
+@contextmanager
+def use_primary():
+    """Направляет все чтения внутри блока в основную базу."""
+    previous = primary_pinned()
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+def get_replicas():
+    return [
+        alias for alias in getattr(settings, 'DATABASE_REPLICAS', [])
+        if alias in settings.DATABASES
+    ]
+
+
+def get_shards():
+    return getattr(settings, 'POSTS_SHARDS', [PRIMARY_DB])
+
+
+def _instance_shard(hints):
+    """Шард, в котором уже лежит объект из подсказки роутеру."""
+    instance = hints.get('instance')
+    if instance is not None and instance._state.db in get_shards():
+        return instance._state.db
+    return None
+
+
+class PrimaryReplicaRouter:
+    """Чтение с реплик, запись и миграции только в основную базу.
+
+    Объекты, загруженные из шарда постов, читаются и пишутся в свой шард.
+    Загруженные с реплики пишутся в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        shard = _instance_shard(hints)
+        if shard is not None and shard != PRIMARY_DB:
+            return shard
+        replicas = get_replicas()
+        if (
+            not replicas
+            or primary_pinned()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return PRIMARY_DB
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Объект пишется в базу, из которой загружен, если это не реплика:
+        # шард, архив или отдельная база в тестах
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db is not None:
+            if instance._state.db not in get_replicas():
+                return instance._state.db
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Пользователи и группы реплицируются во все шарды
+        pool = {PRIMARY_DB, *get_replicas(), *get_shards()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,151 @@
+"""Очередь фоновых задач в базе данных, без внешнего брокера.
+
+Функция, помеченная @task, ставится в очередь вызовом .delay(...) —
+в той же транзакции, что и запрос. Команда run_worker забирает
+готовые задачи и выполняет их в пуле потоков. Захват задачи — это
+UPDATE с условием на прежний run_at: он атомарен и в SQLite, и в
+PostgreSQL, поэтому два воркера не возьмут одну задачу. Упавший
+воркер не теряет задачи: через TASK_CLAIM_TIMEOUT они вернутся.
+Задача хранится по полному пути к функции, так что воркер сам
+импортирует нужный модуль.
+"""
+import datetime as dt
+import json
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+registry = {}
+
+
+class TaskFunction:
+    def __init__(self, func, max_attempts=None):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, countdown=0, eta=None, **kwargs):
+        """Ставит вызов в очередь; аргументы должны сериализоваться в JSON.
+
+        Запуск — через countdown секунд или не раньше момента eta.
+        """
+        if eta is None:
+            eta = timezone.now() + dt.timedelta(seconds=countdown)
+        return Task.objects.create(
+            name=self.name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs}),
+            run_at=eta,
+            max_attempts=self.max_attempts,
+        )
+
+
+def task(func=None, *, max_attempts=None):
+    """Декоратор: @task или @task(max_attempts=3)."""
+    def decorator(func):
+        wrapper = TaskFunction(func, max_attempts)
+        registry[wrapper.name] = wrapper
+        return wrapper
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def retry_delay(attempts):
+    return dt.timedelta(seconds=settings.TASK_RETRY_DELAY * 2 ** attempts)
+
+
+def claim(batch_size):
+    """Захватывает до batch_size готовых задач, откладывая их run_at."""
+    now = timezone.now()
+    lease = now + dt.timedelta(seconds=settings.TASK_CLAIM_TIMEOUT)
+    candidates = Task.objects.filter(run_at__lte=now).exclude(
+        attempts__gte=F('max_attempts')
+    ).values_list('pk', 'run_at')[:batch_size]
+    claimed = [
+        pk for pk, run_at in candidates
+        if Task.objects.filter(pk=pk, run_at=run_at).update(run_at=lease)
+    ]
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+class TaskStats:
+    """Время выполнения по задачам: запуски, ошибки, сумма и максимум."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_name = {}
+
+    def record(self, name, seconds, failed):
+        with self.lock:
+            runs, failures, total, slowest = self.by_name.get(
+                name, (0, 0, 0.0, 0.0)
+            )
+            self.by_name[name] = (
+                runs + 1, failures + failed, total + seconds,
+                max(slowest, seconds),
+            )
+
+    def report(self):
+        with self.lock:
+            items = sorted(self.by_name.items())
+        return [
+            f'{name}: запусков {runs}, ошибок {failures}, '
+            f'в среднем {total / runs * 1000:.1f} мс, '
+            f'максимум {slowest * 1000:.1f} мс'
+            for name, (runs, failures, total, slowest) in items
+        ]
+
+
+stats = TaskStats()
+
+
+def execute(queued):
+    """Выполняет захваченную задачу. Возвращает True при успехе."""
+    started = time.perf_counter()
+    try:
+        func = registry.get(queued.name) or import_string(queued.name)
+        payload = json.loads(queued.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        queued.attempts += 1
+        queued.last_error = traceback.format_exc()
+        queued.run_at = timezone.now() + retry_delay(queued.attempts)
+        queued.save(update_fields=('attempts', 'last_error', 'run_at'))
+        failed = True
+    else:
+        queued.delete()
+        failed = False
+    stats.record(queued.name, time.perf_counter() - started, failed)
+    return not failed
+
+
+def execute_in_thread(queued):
+    # У каждого потока пула своё соединение с базой
+    close_old_connections()
+    try:
+        return execute(queued)
+    finally:
+        close_old_connections()
+
+
+def run_pending(batch_size=100, executor=None):
+    """Выполняет одну пачку задач. Возвращает (успешно, с ошибкой)."""
+    batch = claim(batch_size)
+    if executor is None:
+        results = [execute(queued) for queued in batch]
+    else:
+        results = list(executor.map(execute_in_thread, batch))
+    done = sum(results)
+    return done, len(results) - done
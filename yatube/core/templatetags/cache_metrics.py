@@ -0,0 +1,51 @@
+"""Тег {% cache %}, который считает попадания в кэш фрагментов.
+
+Подключается вместо стандартного: {% load cache_metrics %}.
+"""
+from django import template
+from django.template import NodeList
+from django.templatetags.cache import CacheNode, do_cache
+
+from core.metrics import Counter
+
+register = template.Library()
+
+FRAGMENT_LOOKUPS = Counter(
+    'template_fragment_cache_lookups_total',
+    'Обращения к кэшу фрагментов шаблонов', ('fragment',)
+)
+FRAGMENT_MISSES = Counter(
+    'template_fragment_cache_misses_total',
+    'Промахи кэша фрагментов шаблонов: фрагмент отрендерен заново',
+    ('fragment',)
+)
+
+
+class MissCountingNodeList(NodeList):
+    """Рендерится только при промахе, поэтому сам считает промахи."""
+
+    def __init__(self, nodes, fragment):
+        super().__init__(nodes)
+        self.fragment = fragment
+
+    def render(self, context):
+        FRAGMENT_MISSES.inc(fragment=self.fragment)
+        return super().render(context)
+
+
+class MeteredCacheNode(CacheNode):
+    def render(self, context):
+        FRAGMENT_LOOKUPS.inc(fragment=self.fragment_name)
+        return super().render(context)
+
+
+@register.tag('cache')
+def do_metered_cache(parser, token):
+    node = do_cache(parser, token)
+    return MeteredCacheNode(
+        MissCountingNodeList(node.nodelist, node.fragment_name),
+        node.expire_time_var,
+        node.fragment_name,
+        node.vary_on,
+        node.cache_name,
+    )
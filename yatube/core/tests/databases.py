@@ -0,0 +1,15 @@
+"""Дополнительные SQLite-базы для тестов шардов и реплик.
+
+Базу нужно добавить при импорте модуля с тестами: раннер создаёт и
+мигрирует тестовые базы уже после сбора тестов. Тестовые SQLite-базы
+живут в памяти, поэтому NAME из настроек не используется.
+"""
+from django.db import connections
+
+
+def register_database(alias, **options):
+    connections.databases.setdefault(alias, {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'{alias}.sqlite3',
+        **options,
+    })
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase
+
+from core.asgi import ASGIHandler, wsgi_environ
+
+
+def call(application, scope, body=b''):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return messages
+
+
+def http_scope(path, method='GET', query_string=b'', headers=()):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'localhost'), *headers],
+    }
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    def test_page(self):
+        """Страница отдаётся через ASGI так же, как через WSGI."""
+        messages = call(
+            ASGIHandler(max_threads=2), http_scope('/about/author/')
+        )
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'),
+            messages[0]['headers'],
+        )
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        self.assertIn('Об авторе'.encode(), body)
+        self.assertFalse(messages[-1].get('more_body', False))
+
+    def test_streaming_response_is_sent_by_chunks(self):
+        """Потоковый ответ уходит кусками по мере чтения."""
+        def application(environ, start_response):
+            response = StreamingHttpResponse(iter([b'one', b'two']))
+            start_response('200 OK', list(response.items()))
+            return response
+
+        messages = call(ASGIHandler(application, 1), http_scope('/'))
+        self.assertEqual(
+            [message.get('body') for message in messages[1:]],
+            [b'one', b'two', b''],
+        )
+
+    def test_streaming_runs_in_one_thread(self):
+        """View, куски потокового ответа и close() идут в одном потоке."""
+        threads = []
+
+        class Response(StreamingHttpResponse):
+            def close(self):
+                threads.append(threading.get_ident())
+                super().close()
+
+        def chunks():
+            for chunk in (b'one', b'two'):
+                threads.append(threading.get_ident())
+                yield chunk
+
+        def application(environ, start_response):
+            threads.append(threading.get_ident())
+            response = Response(chunks())
+            start_response('200 OK', list(response.items()))
+            return response
+
+        call(ASGIHandler(application, 4), http_scope('/'))
+        self.assertEqual(len(threads), 4)
+        self.assertEqual(len(set(threads)), 1)
+
+    def test_environ(self):
+        """Путь, строка запроса и заголовки попадают в environ."""
+        environ = wsgi_environ(
+            http_scope(
+                '/группа/', 'POST', b'page=2',
+                [(b'content-type', b'text/plain'), (b'x-a', b'1'),
+                 (b'x-a', b'2')],
+            ),
+            None,
+        )
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/группа/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_A'], '1,2')
+        self.assertEqual(environ['HTTP_HOST'], 'localhost')
+
+    def test_lifespan(self):
+        """Сервер получает подтверждение запуска и остановки."""
+        incoming = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        application = ASGIHandler(max_threads=1)
+        asyncio.run(application({'type': 'lifespan'}, receive, send))
+        self.assertEqual(
+            sent,
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='name')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_cached_request_has_no_queries(self):
+        """Сессия и пользователь на повторном запросе берутся из кэша."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_profile_change_invalidates_user(self):
+        """Изменение пользователя сбрасывает его кэш."""
+        self.client.get(self.url)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Лев')
+
+    def test_password_change_logs_out(self):
+        """После смены пароля старая сессия недействительна."""
+        self.client.get(self.url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+
+from core.middleware import CompressionMiddleware, compress, minify_html
+
+PAGE = b'<html>' + b'<p>Yatube</p>' * 200 + b'</html>'
+
+
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.COMPRESSION_CACHE].clear()
+        self.client = Client()
+
+    def test_minify_keeps_raw_blocks(self):
+        """Минификация схлопывает пробелы, но не трогает pre и textarea."""
+        html = (
+            '<p>\n\n   a  </p>\n  <pre>x\n\n  y</pre>'
+            '\n\n<textarea>\n\n</textarea>'
+        )
+        self.assertEqual(
+            minify_html(html),
+            '<p>\na  </p>\n<pre>x\n\n  y</pre>\n<textarea>\n\n</textarea>'
+        )
+
+    def test_gzip_response(self):
+        """Страница сжимается gzip, если клиент его принимает."""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'<html', gzip.decompress(response.content))
+
+    def test_identity_response(self):
+        """Без Accept-Encoding ответ не сжимается."""
+        response = self.client.get('/')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn(b'<html', response.content)
+
+    def respond(self, request, **headers):
+        """Ответ CompressionMiddleware на одинаковую большую страницу."""
+        def view(request):
+            response = HttpResponse(PAGE, content_type='text/html')
+            for name, value in headers.items():
+                response[name] = value
+            return response
+        return CompressionMiddleware(view)(request)
+
+    def test_shared_page_compressed_once(self):
+        """Общее для всех тело сжимается один раз и дальше берётся из кэша."""
+        factory = RequestFactory(HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch(
+            'core.middleware.compress', wraps=compress
+        ) as compress_mock:
+            first = self.respond(factory.get('/'))
+            second = self.respond(factory.get('/'))
+        self.assertEqual(compress_mock.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertIsNone(cache.get(
+            'compressed:gzip:' + hashlib.md5(PAGE).hexdigest()
+        ))
+
+    def test_private_pages_are_not_cached(self):
+        """Страницы с сессией, Vary: Cookie или private сжимаются заново."""
+        factory = RequestFactory(HTTP_ACCEPT_ENCODING='gzip')
+        with_session = factory.get('/')
+        with_session.COOKIES[settings.SESSION_COOKIE_NAME] = 'key'
+        cases = (
+            (with_session, {}),
+            (factory.get('/'), {'Vary': 'Cookie'}),
+            (factory.get('/'), {'Cache-Control': 'private'}),
+        )
+        for request, headers in cases:
+            with self.subTest(headers=headers):
+                with mock.patch(
+                    'core.middleware.compress', wraps=compress
+                ) as compress_mock:
+                    self.respond(request, **headers)
+                    response = self.respond(request, **headers)
+                self.assertEqual(compress_mock.call_count, 2)
+                self.assertEqual(gzip.decompress(response.content), PAGE)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import claim_batch, send_queued
+from core.models import OutboxMessage
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxEmailBackend',
+    OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+
+    def test_password_reset_is_queued(self):
+        """Письмо сброса пароля ставится в очередь, а не отправляется."""
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'},
+        )
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(send_queued(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failed_message_is_retried_later(self):
+        """Неудачное письмо остаётся в очереди с отложенной попыткой."""
+        mail.send_mail('Тема', 'Текст', None, ['auth@example.com'])
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('refused'),
+        ):
+            self.assertEqual(send_queued(), (0, 1))
+        queued = OutboxMessage.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('refused', queued.last_error)
+        self.assertEqual(send_queued(), (0, 0))
+
+    def test_connection_error_counts_attempt(self):
+        """Ошибка соединения засчитывается попыткой каждому письму."""
+        for number in range(2):
+            mail.send_mail(f'Тема {number}', 'Текст', None, ['a@example.com'])
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=OSError('refused'),
+        ):
+            self.assertEqual(send_queued(), (0, 2))
+        for queued in OutboxMessage.objects.all():
+            with self.subTest(pk=queued.pk):
+                self.assertEqual(queued.attempts, 1)
+                self.assertIn('refused', queued.last_error)
+
+    def test_claimed_message_is_not_claimed_again(self):
+        """Второй воркер не берёт письма, уже взятые первым."""
+        mail.send_mail('Тема', 'Текст', None, ['auth@example.com'])
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
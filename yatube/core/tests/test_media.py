@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.views import serve_media
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'image.jpg'), 'wb') as file:
+            file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, **headers):
+        request = RequestFactory().get('/media/image.jpg', **headers)
+        return serve_media(request, 'image.jpg')
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с ETag и Accept-Ranges."""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+    def test_range(self):
+        """Range отдаёт только запрошенные байты."""
+        cases = {
+            'bytes=10-19': (10, 19),
+            'bytes=1000-': (1000, 1023),
+            'bytes=-4': (1020, 1023),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[start:end + 1]
+                )
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/1024'
+                )
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за концом файла даёт 416."""
+        response = self.get(HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_conditional(self):
+        """If-None-Match и If-Modified-Since дают 304."""
+        response = self.get()
+        self.assertEqual(
+            self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+        self.assertEqual(
+            self.get(
+                HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code,
+            304
+        )
+
+    def test_stale_if_range_returns_full_file(self):
+        """Устаревший If-Range отдаёт файл целиком."""
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_outside_media_root(self):
+        """Пути за пределами MEDIA_ROOT не отдаются."""
+        request = RequestFactory().get('/media/../settings.py')
+        with self.assertRaises(Http404):
+            serve_media(request, '../settings.py')
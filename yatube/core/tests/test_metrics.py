@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core import metrics
+
+REQUESTS = metrics.Counter(
+    'test_requests_total', 'Тестовый счётчик', ('kind',)
+)
+LATENCY = metrics.Histogram(
+    'test_latency_seconds', 'Тестовая гистограмма', buckets=(0.1, 1)
+)
+
+
+def value(name, **labels):
+    metric = metrics.registry[name]
+    return metrics.snapshot().get(metric.key(labels))
+
+
+class MetricsTests(TestCase):
+    def test_counter_from_threads(self):
+        """Счётчики потоков складываются без блокировок на записи."""
+        before = value('test_requests_total', kind='a') or 0
+
+        def work():
+            for _ in range(1000):
+                REQUESTS.inc(kind='a')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(value('test_requests_total', kind='a'), before + 4000)
+
+    def test_finished_threads_are_folded(self):
+        """Словари завершившихся потоков не копятся, а значения остаются."""
+        before = value('test_requests_total', kind='short') or 0
+        for _ in range(50):
+            thread = threading.Thread(
+                target=REQUESTS.inc, kwargs={'kind': 'short'}
+            )
+            thread.start()
+            thread.join()
+        self.assertLess(len(metrics._shards), 10)
+        self.assertEqual(
+            value('test_requests_total', kind='short'), before + 50
+        )
+
+    def test_histogram_exposition(self):
+        """Гистограмма выводится с накопленными корзинами, суммой и числом."""
+        for seconds in (0.05, 0.5, 5):
+            LATENCY.observe(seconds)
+        text = metrics.exposition()
+        self.assertIn('# TYPE test_latency_seconds histogram', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('test_latency_seconds_count 3', text)
+
+    def test_multiprocess_store(self):
+        """С METRICS_DIR выдаются суммы по снимкам всех процессов."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, '1.json'), 'w') as file:
+            json.dump([['test_requests_total', ['other'], 7]], file)
+        REQUESTS.inc(kind='other')
+        with override_settings(METRICS_DIR=directory):
+            collected = metrics.collect()
+            self.assertTrue(
+                os.path.exists(os.path.join(directory, f'{os.getpid()}.json'))
+            )
+        own = value('test_requests_total', kind='other')
+        self.assertEqual(
+            collected[('test_requests_total', ('other',))], own + 7
+        )
+
+    def test_endpoint(self):
+        """/metrics отдаёт время ответов по имени URL и кэш фрагментов."""
+        cache.clear()
+        lookups = value(
+            'template_fragment_cache_lookups_total', fragment='index_page'
+        ) or 0
+        misses = value(
+            'template_fragment_cache_misses_total', fragment='index_page'
+        ) or 0
+        self.client.get('/')
+        self.client.get('/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="posts:index"}', text
+        )
+        self.assertIn(
+            'http_requests_total{view="posts:index",status="200"}', text
+        )
+        self.assertEqual(value(
+            'template_fragment_cache_lookups_total', fragment='index_page'
+        ), lookups + 2)
+        self.assertEqual(value(
+            'template_fragment_cache_misses_total', fragment='index_page'
+        ), misses + 1)
+
+    def test_endpoint_is_internal(self):
+        """Снаружи /metrics не виден."""
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.1')
+        self.assertEqual(response.status_code, 404)
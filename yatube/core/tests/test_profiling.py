@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+
+from core.profiling import parse_importtime, run_boot
+
+IMPORTTIME = '''import time: self [us] | cumulative | imported package
+import time:        10 |         10 | early
+# stage: setup
+import time:       100 |        100 |   child
+import time:        50 |        150 | parent
+# stage: request
+import time:         7 |          7 | late
+'''
+
+
+class ProfilingTests(SimpleTestCase):
+    def test_parse_importtime_by_stage(self):
+        """Вывод -X importtime раскладывается по этапам запуска."""
+        imports = parse_importtime(IMPORTTIME)
+        self.assertEqual(
+            imports['setup'], [(1, 100, 100, 'child'), (0, 50, 150, 'parent')]
+        )
+        self.assertEqual(imports['wsgi'], [])
+        self.assertEqual(imports['request'], [(0, 7, 7, 'late')])
+
+    def test_cold_start_does_not_import_pil(self):
+        """Старт и первый запрос обходятся без PIL."""
+        report = run_boot('/about/author/', importtime=True)
+        self.assertEqual(report['status'], '200 OK')
+        self.assertEqual(set(report['timings']), set(report['imports']))
+        modules = {
+            record[3] for stage in report['imports'].values()
+            for record in stage
+        }
+        self.assertIn('posts.forms', modules)
+        self.assertNotIn('PIL', modules)
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.middleware import STICKY_SESSION_KEY
+from core.routers import PrimaryReplicaRouter, use_primary
+from core.tests.databases import register_database
+from posts.models import Post
+
+User = get_user_model()
+
+REPLICA = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': 'replica.sqlite3',
+}
+
+# Реплика-зеркало: в тестах это второе соединение к той же базе
+register_database('replica', TEST={'MIRROR': 'default'})
+
+
+class PrimaryReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_without_replicas_reads_primary(self):
+        """Без реплик чтение идёт в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_go_to_replica(self):
+        """Чтение идёт на реплику, запись — в основную базу."""
+        databases = {'default': {}, 'replica': REPLICA}
+        with override_settings(
+            DATABASES=databases, DATABASE_REPLICAS=['replica']
+        ):
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+            self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    def test_use_primary_pins_reads(self):
+        """Внутри use_primary чтение закреплено за основной базой."""
+        databases = {'default': {}, 'replica': REPLICA}
+        with override_settings(
+            DATABASES=databases, DATABASE_REPLICAS=['replica']
+        ):
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+
+class PrimaryStickinessTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_view_marks_session(self):
+        """После записи сессия залипает на основной базе."""
+        with mock.patch(
+            'core.middleware.get_replicas', return_value=['replica']
+        ):
+            self.client.post(
+                reverse('posts:post_create'), {'text': 'Новый пост'}
+            )
+        self.assertIn(STICKY_SESSION_KEY, self.client.session)
+
+    def test_write_view_without_replicas_keeps_session(self):
+        """Без реплик сессия не трогается."""
+        self.client.post(reverse('posts:post_create'), {'text': 'Новый пост'})
+        self.assertNotIn(STICKY_SESSION_KEY, self.client.session)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class RealReplicaTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_primary_read_replica(self):
+        """Запись идёт в основную базу, чтение — через алиас реплики."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        self.assertEqual(post._state.db, 'default')
+        posts = Post.objects.all()
+        self.assertEqual(posts.db, 'replica')
+        self.assertEqual(list(posts), [post])
+        self.assertEqual(posts[0]._state.db, 'replica')
+
+    def test_only_successful_writes_stick(self):
+        """Форма и неверный POST не залипают, успешная запись — да."""
+        url = reverse('posts:post_create')
+        self.client.get(url)
+        self.assertNotIn(STICKY_SESSION_KEY, self.client.session)
+        self.client.post(url, {'text': ''})
+        self.assertNotIn(STICKY_SESSION_KEY, self.client.session)
+        self.client.post(url, {'text': 'Новый пост'})
+        self.assertIn(STICKY_SESSION_KEY, self.client.session)
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+
+CSS = 'body { color: red; }\n' * 100
+
+
+class StaticPipelineTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'app.css'), 'w') as css:
+            css.write(CSS)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        with open(os.path.join(self.root, 'staticfiles.json')) as manifest:
+            self.hashed = json.load(manifest)['paths']['css/app.css']
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse('view')
+        )
+
+    def test_collectstatic_writes_gzip_sibling(self):
+        """collectstatic создаёт сжатую копию хэшированного файла."""
+        self.assertNotEqual(self.hashed, 'css/app.css')
+        self.assertTrue(
+            os.path.exists(os.path.join(self.root, self.hashed + '.gz'))
+        )
+
+    def test_serves_compressed_immutable_file(self):
+        """Хэшированный файл отдаётся сжатым и кэшируется навсегда."""
+        request = RequestFactory().get(
+            f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertLess(int(response['Content-Length']), len(CSS))
+
+    def test_plain_name_and_other_paths(self):
+        """Нехэшированное имя ревалидируется, прочие пути идут во view."""
+        response = self.middleware(RequestFactory().get('/static/css/app.css'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertNotIn('Content-Encoding', response)
+        response = self.middleware(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'view')
@@ -0,0 +1,66 @@
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from core.models import OutboxMessage, Task
+from core.tasks import claim, run_pending, stats, task
+
+calls = []
+
+
+@task
+def record(value, twice=False):
+    calls.append(value * 2 if twice else value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise ValueError('boom')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_runs_in_worker(self):
+        """delay() ставит задачу в очередь, воркер выполняет и удаляет её."""
+        record.delay(3, twice=True)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(calls, [6])
+        self.assertFalse(Task.objects.exists())
+        self.assertIn(record.name, stats.by_name)
+
+    def test_claimed_task_is_not_taken_twice(self):
+        """Захваченную задачу не получит второй воркер."""
+        record.delay(1)
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_countdown(self):
+        """Задача с countdown не выполняется раньше срока."""
+        record.delay(1, countdown=60)
+        self.assertEqual(run_pending(), (0, 0))
+
+    def test_failed_task_backs_off_and_gives_up(self):
+        """Ошибка откладывает задачу, после max_attempts её больше не берут."""
+        queued = explode.delay()
+        self.assertEqual(run_pending(), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('boom', queued.last_error)
+        self.assertEqual(run_pending(), (0, 0))
+        Task.objects.update(run_at=queued.created)
+        self.assertEqual(run_pending(), (0, 1))
+        Task.objects.update(run_at=queued.created)
+        self.assertEqual(claim(10), [])
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.OutboxEmailBackend',
+        OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_outbox_is_delivered_by_task(self):
+        """Письмо из очереди отправляет фоновая задача deliver_outbox."""
+        mail.send_mail('Тема', 'Текст', None, ['auth@example.com'])
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
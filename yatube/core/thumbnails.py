@@ -0,0 +1,17 @@
+"""Бэкенд sorl-thumbnail, который замеряет генерацию миниатюр."""
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .metrics import Histogram
+
+THUMBNAIL_SECONDS = Histogram(
+    'thumbnail_generation_seconds', 'Время создания миниатюры'
+)
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        with THUMBNAIL_SECONDS.time():
+            return super()._create_thumbnail(
+                source_image, geometry_string, options, thumbnail
+            )
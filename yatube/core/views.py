@@ -1,4 +1,20 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import metrics
+from .storage import CONTENT_ADDRESSED_RE
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SITEMAP_NAME_RE = re.compile(r'^sitemap(-[a-z]+-\d+\.xml\.gz|\.xml)$')
 
 
 def page_not_found(request, exception=None):
@@ -15,3 +31,149 @@ def permission_denied(request, exeption=None):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+class RangeFile:
+    """Файл, из которого читается не больше length байт от текущей позиции.
+
+    fileno() и tell() проброшены, поэтому wsgi.file_wrapper сервера
+    может отдать диапазон через sendfile без чтения в Python.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Возвращает (start, end) для одного диапазона или None.
+
+    Несколько диапазонов не поддерживаем: по RFC 7233 можно отдать файл
+    целиком. Для неудовлетворимого диапазона бросает ValueError.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def file_response(request, full_path, stat, etag):
+    size = stat.st_size
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(
+        request, etag, stat.st_mtime
+    ):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        size = end - start + 1
+    response['Content-Length'] = str(size)
+    response['Content-Type'] = (
+        mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    )
+    return response
+
+
+def serve_file(request, root, path):
+    """Отдаёт файл из root с ETag, 304 и поддержкой Range."""
+    try:
+        full_path = safe_join(root, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    etag = '"{:x}-{:x}"'.format(stat.st_mtime_ns, stat.st_size)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        try:
+            response = file_response(request, full_path, stat, etag)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_media(request, path):
+    """Отдаёт файл из MEDIA_ROOT."""
+    response = serve_file(request, settings.MEDIA_ROOT, path)
+    response['Cache-Control'] = (
+        'public, max-age=31536000, immutable'
+        if CONTENT_ADDRESSED_RE.match(os.path.basename(path))
+        else 'public, max-age=3600'
+    )
+    return response
+
+
+def serve_sitemap(request, name):
+    """Готовые файлы sitemap из SITEMAP_ROOT, собранные build_sitemaps."""
+    if not SITEMAP_NAME_RE.match(name):
+        raise Http404(name)
+    response = serve_file(request, settings.SITEMAP_ROOT, name)
+    if name.endswith('.gz'):
+        # Поисковики ждут сжатый файл как есть, а не Content-Encoding
+        response['Content-Type'] = 'application/gzip'
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def robots_txt(request):
+    lines = [
+        'User-agent: *',
+        'Disallow: /*?page=',
+        f'Sitemap: {settings.SITE_URL}/sitemap.xml',
+    ]
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain')
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus, только для METRICS_ALLOWED_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(
+        metrics.exposition(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,9 +1,47 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+
+from core.admin import FullTextSearchMixin, ScalableModelAdmin
 
 from .models import Comment, Follow, Group, Post
+from .moderation import (delete_by_author, delete_comments, delete_posts,
+                         move_to_group)
+
+
+def run(progress):
+    """Выполняет генератор модерации и возвращает число строк."""
+    done = {}
+    for part, count in progress:
+        done[part] = count
+    return sum(done.values())
+
+
+def numbered(progress):
+    return ((None, count) for count in progress)
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа',
+        empty_label='без группы'
+    )
+
+
+def delete_authors_content(modeladmin, request, queryset):
+    authors = set(queryset.values_list('author_id', flat=True))
+    deleted = run(delete_by_author(authors))
+    modeladmin.message_user(
+        request, f'Удалено постов и комментариев: {deleted}'
+    )
+
+
+delete_authors_content.short_description = (
+    'Удалить все посты и комментарии авторов выбранного'
+)
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, ScalableModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,16 +49,72 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    # Группа выбирается поиском, а не списком из всех групп
+    autocomplete_fields = ('group',)
+    raw_id_fields = ('author',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('delete_fast', 'move_to_group', delete_authors_content)
+
+    def delete_fast(self, request, queryset):
+        deleted = run(numbered(delete_posts(queryset)))
+        self.message_user(request, f'Удалено постов: {deleted}')
+
+    delete_fast.short_description = 'Удалить выбранные посты с комментариями'
+
+    def move_to_group(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid():
+            # Иначе неверная группа молча убрала бы посты из их групп
+            self.message_user(
+                request, 'Выберите существующую группу',
+                level=messages.ERROR
+            )
+            return
+        group = form.cleaned_data['group']
+        moved = run(numbered(move_to_group(queryset, group)))
+        self.message_user(request, f'Перенесено постов: {moved}')
+
+    move_to_group.short_description = 'Перенести выбранные посты в группу'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class CommentAdmin(FullTextSearchMixin, ScalableModelAdmin):
+    list_display = ('pk', 'text', 'author', 'post', 'created')
+    list_select_related = ('author', 'post')
+    raw_id_fields = ('post', 'author')
+    search_fields = ('text',)
+    date_hierarchy = 'created'
+    actions = ('delete_fast', delete_authors_content)
+
+    def delete_fast(self, request, queryset):
+        deleted = run(numbered(delete_comments(queryset)))
+        self.message_user(request, f'Удалено комментариев: {deleted}')
+
+    delete_fast.short_description = 'Удалить выбранные комментарии'
+
+
+class FollowAdmin(ScalableModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
 
 
 admin.site.register(Post, PostAdmin)
 
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 
-admin.site.register(Comment)
+admin.site.register(Comment, CommentAdmin)
 
-admin.site.register(Follow)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,79 @@
+"""Перенос старых постов с комментариями в архивные таблицы.
+
+Посты пачки удаляются из шарда без Collector, как в posts.moderation:
+комментарии и теги — своими DELETE, затем посты. Сигналов на каждый
+пост нет, поэтому карточки и ленты пачки сбрасываются здесь же.
+"""
+import datetime as dt
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.routers import get_shards
+
+from .cards import bump_versions
+from .feeds import bump_posts
+from .models import ArchivedComment, ArchivedPost, Comment, Post, PostTag
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_db():
+    return getattr(settings, 'POSTS_ARCHIVE_DB', 'default')
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - dt.timedelta(days=days)
+
+
+def archive_batch(alias, cutoff, batch_size):
+    """Переносит одну пачку постов шарда alias. Возвращает её размер."""
+    target = archive_db()
+    with transaction.atomic(using=alias), transaction.atomic(using=target):
+        posts = list(
+            Post.objects.using(alias)
+            .filter(pub_date__lt=cutoff, is_published=True)
+            .order_by('pk')
+            .values(*POST_FIELDS)[:batch_size]
+        )
+        if not posts:
+            return 0
+        ids = [post['id'] for post in posts]
+        comments = Comment.objects.using(alias).filter(post_id__in=ids)
+        ArchivedPost.objects.using(target).bulk_create(
+            ArchivedPost(**post) for post in posts
+        )
+        ArchivedComment.objects.using(target).bulk_create(
+            ArchivedComment(**comment)
+            for comment in comments.values(*COMMENT_FIELDS)
+        )
+        bump_posts(alias, ids)
+        comments._raw_delete(alias)
+        PostTag.objects.using(alias).filter(post_id__in=ids)._raw_delete(
+            alias
+        )
+        # Комментарии и теги уже удалены, других ссылок на пост нет
+        Post.objects.using(alias).filter(pk__in=ids)._raw_delete(alias)
+    bump_versions('post', ids)
+    return len(posts)
+
+
+def archive_posts(days=None, batch_size=None):
+    """Пачками архивирует посты старше days дней во всех шардах.
+
+    Генератор: после каждой пачки отдаёт (шард, перенесено в шарде).
+    """
+    cutoff = archive_cutoff(days)
+    batch_size = batch_size or settings.POSTS_ARCHIVE_BATCH_SIZE
+    for alias in get_shards():
+        moved = 0
+        while True:
+            count = archive_batch(alias, cutoff, batch_size)
+            if not count:
+                break
+            moved += count
+            yield alias, moved
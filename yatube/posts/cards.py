@@ -0,0 +1,78 @@
+"""Общий для всех лент кэш HTML-карточек постов.
+
+Ключ карточки содержит версии поста, автора и группы. Изменение любого
+из них меняет версию, и старые карточки просто перестают читаться —
+не нужно искать и удалять ключи всех постов автора или группы.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+CARD_KEY = 'post_card:{}:{}'
+VERSION_KEY = 'post_card_version:{}:{}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def bump_version(kind, pk):
+    """Сбрасывает карточки, зависящие от объекта: post, author или group."""
+    cache.set(VERSION_KEY.format(kind, pk), _new_version(), None)
+
+
+def bump_versions(kind, pks):
+    """То же для многих объектов одним set_many."""
+    cache.set_many(
+        {VERSION_KEY.format(kind, pk): _new_version() for pk in pks}, None
+    )
+
+
+def _version_keys(post):
+    return (
+        VERSION_KEY.format('post', post.pk),
+        VERSION_KEY.format('author', post.author_id),
+        VERSION_KEY.format('group', post.group_id),
+    )
+
+
+def _card_keys(posts):
+    """Ключи карточек: версии всей страницы читаются одним get_many."""
+    version_keys = {key for post in posts for key in _version_keys(post)}
+    versions = cache.get_many(version_keys)
+    missing = {
+        key: _new_version() for key in version_keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [
+        CARD_KEY.format(
+            post.pk, '.'.join(versions[key] for key in _version_keys(post))
+        )
+        for post in posts
+    ]
+
+
+def render_cards(posts):
+    """HTML карточек страницы: кэш читается одним get_many.
+
+    Рендерятся только отсутствующие в кэше карточки, поэтому пост
+    рендерится один раз для всех лент и страниц.
+    """
+    posts = list(posts)
+    keys = _card_keys(posts)
+    cards = cache.get_many(keys)
+    fresh = {
+        key: render_to_string(CARD_TEMPLATE, {'post': post})
+        for key, post in zip(keys, posts)
+        if key not in cards
+    }
+    if fresh:
+        cache.set_many(fresh, settings.POST_CARD_TIMEOUT)
+        cards.update(fresh)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,12 @@
+from .notifications import unread_count
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений для шапки.
+
+    Обычно из кэша; при промахе — один запрос строки счётчика.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': unread_count(user.pk)}
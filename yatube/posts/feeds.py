@@ -0,0 +1,193 @@
+"""RSS и Atom: общая лента, лента группы и лента автора.
+
+У каждой ленты (index, group:<slug>, author:<username>) в кэше лежит
+состояние — версия и время последнего изменения. Сигналы поста меняют
+версию его лент, поэтому готовый XML кэшируется под ключом с версией и
+рендерится один раз на изменение. Опрос ленты стоит чтения состояния
+из кэша: ответ 304 по ETag или Last-Modified, иначе XML из кэша.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+
+from . import repository
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_ITEMS = 20
+STATE_KEY = 'feed_state:{}'
+FEED_KEY = 'feed:{}:{}:{}'
+
+
+def _new_state():
+    return uuid.uuid4().hex[:12], time.time()
+
+
+def bump(*scopes):
+    """Новая версия лент: их старый XML больше не читается."""
+    new_state = _new_state()
+    cache.set_many(
+        {STATE_KEY.format(scope): new_state for scope in scopes},
+        settings.FEEDS_CACHE_TIMEOUT,
+    )
+
+
+def bump_posts(using, pks, *scopes):
+    """Сбрасывает ленты пачки постов: общую, их авторов и групп.
+
+    Для массовых UPDATE и DELETE, которые не шлют сигналов поста.
+    """
+    scopes = {index_scope(), *scopes}
+    rows = Post.objects.using(using).filter(pk__in=pks).values_list(
+        'author__username', 'group__slug'
+    ).distinct()
+    for username, slug in rows:
+        scopes.add(author_scope(username))
+        if slug is not None:
+            scopes.add(group_scope(slug))
+    bump(*scopes)
+
+
+def state(scope):
+    """(версия, время изменения); без состояния лента считается новой."""
+    key = STATE_KEY.format(scope)
+    current = cache.get(key)
+    if current is None:
+        current = _new_state()
+        if not cache.add(key, current, settings.FEEDS_CACHE_TIMEOUT):
+            current = cache.get(key, current)
+    return current
+
+
+class PostsFeed(Feed):
+    description_template = None
+
+    def items(self, obj):
+        return list(repository.feed()[:FEED_ITEMS])
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group_id else []
+
+    def title(self, obj):
+        return 'Yatube: последние записи'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def description(self, obj):
+        return self.title(obj)
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def items(self, obj):
+        return list(repository.feed(group=obj)[:FEED_ITEMS])
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=(obj.slug,))
+
+    def description(self, obj):
+        return obj.description
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def items(self, obj):
+        return list(repository.author_posts(obj.pk)[:FEED_ITEMS])
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+
+def atom(feed_class):
+    return type(
+        f'Atom{feed_class.__name__}', (feed_class,),
+        {'feed_type': Atom1Feed, 'subtitle': feed_class.description},
+    )
+
+
+def cached_feed(feed_class, scope_name):
+    """View ленты с условными запросами и XML из кэша.
+
+    scope_name строит имя ленты из аргументов URL, без запросов к базе.
+    """
+    feed = feed_class()
+    kind = feed_class.__name__
+
+    def view(request, **kwargs):
+        scope = scope_name(**kwargs)
+        version, modified = state(scope)
+        etag = quote_etag(f'{kind}-{version}')
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(modified)
+        )
+        if response is None:
+            key = FEED_KEY.format(kind, scope, version)
+            cached = cache.get(key)
+            if cached is None:
+                rendered = feed(request, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                cache.set(key, cached, settings.FEEDS_CACHE_TIMEOUT)
+            response = HttpResponse(cached[0], content_type=cached[1])
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+
+    return view
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+index_rss = cached_feed(PostsFeed, index_scope)
+index_atom = cached_feed(atom(PostsFeed), index_scope)
+group_rss = cached_feed(GroupFeed, group_scope)
+group_atom = cached_feed(atom(GroupFeed), group_scope)
+author_rss = cached_feed(AuthorFeed, author_scope)
+author_atom = cached_feed(atom(AuthorFeed), author_scope)
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
 
+from .images import process_upload
 from .models import Comment, Post
 
 
@@ -19,8 +22,45 @@ class PostForm(forms.ModelForm):
             raise forms.ValidationError('Поле должно быть заполнено')
         return data
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return process_upload(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class ScheduleForm(forms.Form):
+    """Время отложенной публикации; пустое — опубликовать сразу.
+
+    Отдельная форма, чтобы PostForm оставалась формой полей поста.
+    """
+    publish_at = forms.DateTimeField(
+        label='Опубликовать',
+        required=False,
+        input_formats=('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'),
+        widget=forms.DateTimeInput(
+            attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'
+        ),
+        help_text='Оставьте пустым, чтобы опубликовать сразу'
+    )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at is not None and publish_at <= timezone.now():
+            raise forms.ValidationError('Время публикации уже прошло')
+        return publish_at
+
+    def apply(self, post):
+        """Переносит расписание в пост, ещё не сохраняя его."""
+        post.publish_at = self.cleaned_data['publish_at']
+        post.is_published = post.publish_at is None
+        if post.is_published and post.pk is not None:
+            # Отложенный пост публикуют сразу: он встаёт в начало лент
+            post.pub_date = timezone.now()
+        return post
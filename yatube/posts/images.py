@@ -0,0 +1,89 @@
+"""Обработка загруженных картинок постов.
+
+Загрузка целиком лежит во временном файле на диске, а не в памяти.
+Картинка уменьшается до POST_IMAGE_MAX_SIZE, лишается EXIF и заново
+кодируется. Имя файла — sha256 исходного содержимого, поэтому повторная
+загрузка того же файла не кодируется и не пишется на диск ещё раз.
+
+PIL импортируется при первой загрузке, а не при старте процесса.
+"""
+import hashlib
+import io
+import os
+
+from django import forms
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+UPLOAD_TO = 'posts/'
+JPEG_OPTIONS = {'quality': 85, 'optimize': True, 'progressive': True}
+PNG_OPTIONS = {'optimize': True}
+
+
+def file_digest(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def content_name(digest, extension):
+    """Имя внутри upload_to, с разбивкой по первым символам хэша."""
+    return f'{digest[:2]}/{digest}.{extension}'
+
+
+def reuse(name):
+    """Обновляет mtime существующего файла; False, если файла нет.
+
+    Свежий mtime не даёт gc_media удалить старую сироту, на которую
+    вот-вот сошлётся новый пост.
+    """
+    try:
+        os.utime(default_storage.path(name))
+    except NotImplementedError:
+        # Хранилище не на диске: mtime не трогаем
+        return default_storage.exists(name)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def encode(image):
+    """Перекодирует картинку без метаданных: PNG с альфой, иначе JPEG."""
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    output = io.BytesIO()
+    if has_alpha(image):
+        image.convert('RGBA').save(output, 'PNG', **PNG_OPTIONS)
+    else:
+        image.convert('RGB').save(output, 'JPEG', **JPEG_OPTIONS)
+    return output.getvalue()
+
+
+def process_upload(upload):
+    """Возвращает обработанную картинку с именем по хэшу содержимого."""
+    from PIL import Image
+
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise forms.ValidationError('Файл слишком большой')
+    digest = file_digest(upload)
+    with Image.open(upload) as image:
+        width, height = image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError('Слишком большое разрешение')
+        extension = 'png' if has_alpha(image) else 'jpg'
+        name = content_name(digest, extension)
+        if reuse(UPLOAD_TO + name):
+            # Такой файл уже есть: хранилище вернёт его имя, не записывая
+            return ContentFile(b'', name=name)
+        return ContentFile(encode(image), name=name)
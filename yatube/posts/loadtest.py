@@ -0,0 +1,136 @@
+"""Сценарии нагрузочного прогона ленты (см. core.loadtest).
+
+Данные создаются фикстурами mixer и Faker, как в тестах. Вес сценария
+задаёт долю трафика; сценарии с входом выполняют только пользователи с
+сессией.
+"""
+import io
+import random
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from faker import Faker
+from mixer.backend.django import mixer
+
+from .models import Comment, Group, Post
+from .views import POSTS_LIMIT
+
+User = get_user_model()
+USERNAME_PREFIX = 'loadtest'
+fake = Faker('ru_RU')
+
+
+def seed(users, posts, groups, comments):
+    """Добавляет данные к уже существующим; возвращает контекст прогона."""
+    start = User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).count()
+    mixer.cycle(users).blend(
+        User, username=(
+            f'{USERNAME_PREFIX}{index}'
+            for index in range(start, start + users)
+        )
+    )
+    mixer.cycle(groups).blend(Group, description=fake.paragraph)
+    mixer.cycle(posts).blend(
+        Post, author=mixer.SELECT, group=mixer.SELECT, image='',
+        text=lambda: fake.text(400),
+    )
+    mixer.cycle(comments).blend(
+        Comment, post=mixer.SELECT, author=mixer.SELECT,
+        text=lambda: fake.sentence(),
+    )
+    return load_context()
+
+
+def load_context():
+    post_count = Post.objects.count()
+    return {
+        'usernames': list(User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).values_list('username', flat=True)),
+        'post_ids': list(Post.objects.values_list('pk', flat=True)),
+        'slugs': list(Group.objects.values_list('slug', flat=True)),
+        'max_page': max(1, -(-post_count // POSTS_LIMIT)),
+    }
+
+
+def login_sessions(usernames):
+    """Ключи сессий без формы входа: прогон не меряет хэширование пароля."""
+    client = Client()
+    keys = []
+    for user in User.objects.filter(username__in=usernames):
+        client.force_login(user)
+        keys.append(client.cookies['sessionid'].value)
+        client.cookies.clear()
+    return keys
+
+
+def image_upload():
+    """Маленькая PNG со случайным цветом: каждая загрузка уникальна."""
+    from PIL import Image
+
+    output = io.BytesIO()
+    color = tuple(random.randrange(256) for _ in range(3))
+    Image.new('RGB', (64, 64), color).save(output, 'PNG')
+    return output.getvalue()
+
+
+def index(user):
+    user.get('index', '/')
+
+
+def index_deep(user):
+    page = random.randint(1, user.context['max_page'])
+    user.get('index?page=N', f'/?page={page}')
+
+
+def group(user):
+    if user.context['slugs']:
+        slug = random.choice(user.context['slugs'])
+        user.get('group_list', f'/group/{slug}/')
+
+
+def profile(user):
+    username = random.choice(user.context['usernames'])
+    user.get('profile', f'/profile/{username}/')
+
+
+def post_detail(user):
+    post_id = random.choice(user.context['post_ids'])
+    user.get('post_detail', f'/posts/{post_id}/')
+
+
+def follow(user):
+    author = random.choice(user.context['usernames'])
+    user.get('profile_follow', f'/profile/{author}/follow/')
+    user.get('follow_index', '/follow/')
+
+
+def comment(user):
+    post_id = random.choice(user.context['post_ids'])
+    user.post(
+        'add_comment', f'/posts/{post_id}/comment',
+        data={'text': fake.sentence()},
+    )
+
+
+def create_post(user):
+    user.post(
+        'post_create', '/create/',
+        data={'text': fake.text(300)},
+        files={'image': ('load.png', image_upload(), 'image/png')},
+    )
+
+
+# (вес, сценарий, нужен ли вход)
+SCENARIOS = (
+    (30, index, False),
+    (10, index_deep, False),
+    (10, group, False),
+    (15, profile, False),
+    (15, post_detail, False),
+    (8, follow, True),
+    (7, comment, True),
+    (5, create_post, True),
+)
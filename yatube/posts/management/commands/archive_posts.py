@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и комментарии к ним в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Архивировать посты старше указанного числа дней'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько постов переносить за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        moved_by_shard = {}
+        for alias, moved in archive_posts(
+            options['days'], options['batch_size']
+        ):
+            moved_by_shard[alias] = moved
+            self.stdout.write(f'{alias}: перенесено {moved}')
+        total = sum(moved_by_shard.values())
+        self.stdout.write(self.style.SUCCESS(f'Перенесено постов: {total}'))
@@ -0,0 +1,70 @@
+import statistics
+import timeit
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post
+from posts.views import POSTS_LIMIT
+
+User = get_user_model()
+
+
+def make_page(size):
+    """Страница из несохранённых постов: замер не трогает базу."""
+    author = User(pk=1, username='bench', first_name='Лев', last_name='Т')
+    group = Group(pk=1, title='Тестовая группа', slug='bench')
+    posts = [
+        Post(
+            pk=pk,
+            author=author,
+            group=group,
+            text='Тестовый пост\n' * 5,
+            pub_date=timezone.now(),
+        )
+        for pk in range(size, 0, -1)
+    ]
+    return Paginator(posts, POSTS_LIMIT).get_page(1)
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время рендера страницы ленты из POSTS_LIMIT постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template', default='posts/follow.html',
+            help='Шаблон ленты, который рендерим'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Сколько раз рендерить страницу'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш карточек перед каждым рендером'
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {'page_obj': make_page(POSTS_LIMIT * 3)}
+        # Первый рендер прогревает загрузчик шаблонов и кэш reverse()
+        render_to_string(options['template'], context, request)
+        timings = timeit.repeat(
+            lambda: render_to_string(options['template'], context, request),
+            setup=cache.clear if options['cold'] else 'pass',
+            number=1,
+            repeat=options['repeat'],
+        )
+        median = statistics.median(timings) * 1000
+        self.stdout.write(
+            f'{options["template"]}: {POSTS_LIMIT} постов, '
+            f'медиана {median:.2f} мс, минимум {min(timings) * 1000:.2f} мс, '
+            f'на пост {median / POSTS_LIMIT:.3f} мс'
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Собирает sitemap постов, групп и авторов в SITEMAP_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересобрать все куски, а не только новые'
+        )
+
+    def handle(self, *args, **options):
+        chunks = urls = 0
+        for section, number, count in build_sitemaps(full=options['full']):
+            self.stdout.write(f'{section} #{number}: {count} URL')
+            chunks += 1
+            urls += count
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано кусков: {chunks}, URL в них: {urls}'
+        ))
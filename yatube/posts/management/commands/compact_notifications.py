@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import compact_notifications
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые уведомления и пересчитывает счётчики непрочитанных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Удалить уведомления старше указанного числа дней'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Сколько уведомлений удалять за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for deleted in compact_notifications(
+            options['days'], options['chunk_size']
+        ):
+            self.stdout.write(f'Удалено {deleted}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено уведомлений: {deleted}')
+        )
@@ -0,0 +1,139 @@
+import argparse
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.routers import get_shards, use_primary
+from posts.models import ArchivedPost, Post
+
+POSTS_DIR = 'posts'
+
+
+def scan_files(root, subdir, min_age):
+    """Потоково обходит root/subdir и отдаёт имена файлов от MEDIA_ROOT.
+
+    os.scandir не строит список каталога целиком, а в памяти держится
+    только стек открытых каталогов. Файлы моложе min_age секунд
+    пропускаются: их пост ещё может сохраняться.
+    """
+    deadline = time.time() - min_age
+    stack = [os.path.join(root, subdir)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.stat().st_mtime < deadline:
+                    relative = os.path.relpath(entry.path, root)
+                    yield relative.replace(os.sep, '/')
+
+
+def rate(value):
+    """Неотрицательное число удалений в секунду; 0 — без ограничения."""
+    value = float(value)
+    if value < 0:
+        raise argparse.ArgumentTypeError('должно быть не меньше 0')
+    return value
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def referenced_images(names):
+    """Имена из пачки, на которые ссылаются посты: шарды и архив."""
+    querysets = [
+        Post.objects.using(alias) for alias in get_shards()
+    ] + [ArchivedPost.objects.using(settings.POSTS_ARCHIVE_DB)]
+    referenced = set()
+    for queryset in querysets:
+        referenced.update(
+            queryset.filter(image__in=names).values_list('image', flat=True)
+        )
+    return referenced
+
+
+def referenced_thumbnails(names):
+    """Имена миниатюр из пачки, которые ещё записаны в KV-хранилище sorl."""
+    from sorl.thumbnail import default
+    from sorl.thumbnail.images import ImageFile
+    from sorl.thumbnail.kvstores.base import add_prefix
+    from sorl.thumbnail.models import KVStore
+
+    keys = {
+        add_prefix(ImageFile(name, default.storage).key): name
+        for name in names
+    }
+    return {
+        keys[key] for key in KVStore.objects.filter(
+            key__in=keys
+        ).values_list('key', flat=True)
+    }
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки постов и миниатюры, на которые никто не ссылается'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы-сироты, ничего не удаляя'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько файлов сверять с базой за один запрос'
+        )
+        parser.add_argument(
+            '--max-rate', type=rate, default=100,
+            help='Не больше стольких удалений в секунду, 0 — без ограничения'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+
+    def handle(self, *args, **options):
+        from sorl.thumbnail import delete
+        from sorl.thumbnail.conf import settings as thumbnail_settings
+
+        self.options = options
+        self.deleted = 0
+        # Реплика может отставать: сверяемся только с основной базой
+        with use_primary():
+            self.collect(POSTS_DIR, referenced_images, delete)
+            self.collect(
+                thumbnail_settings.THUMBNAIL_PREFIX.strip('/'),
+                referenced_thumbnails,
+                self.delete_thumbnail,
+            )
+        verb = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} сирот: {self.deleted}'))
+
+    def delete_thumbnail(self, name):
+        from sorl.thumbnail import default
+
+        default.storage.delete(name)
+
+    def collect(self, subdir, referenced, delete):
+        options = self.options
+        files = scan_files(settings.MEDIA_ROOT, subdir, options['min_age'])
+        for batch in batches(files, options['batch_size']):
+            orphans = set(batch) - referenced(batch)
+            for name in sorted(orphans):
+                self.stdout.write(name)
+                if not options['dry_run']:
+                    delete(name)
+                    if options['max_rate']:
+                        time.sleep(1 / options['max_rate'])
+            self.deleted += len(orphans)
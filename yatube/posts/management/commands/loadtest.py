@@ -0,0 +1,114 @@
+import random
+import subprocess
+import sys
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import Stats, VirtualUser, run_stage
+from posts.loadtest import SCENARIOS, load_context, login_sessions, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон смешанного трафика против локального сервера '
+        'с отчётом по эндпоинтам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', help='Адрес уже запущенного сервера; иначе запускаем '
+            'runserver на --port'
+        )
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--users', type=int, nargs='+', default=[1, 5, 20],
+            help='Число виртуальных пользователей по ступеням'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=20,
+            help='Длительность каждой ступени, секунд'
+        )
+        parser.add_argument(
+            '--anonymous', type=float, default=0.5,
+            help='Доля пользователей без входа'
+        )
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Сначала добавить данные фикстурами mixer и Faker'
+        )
+        parser.add_argument('--seed-users', type=int, default=50)
+        parser.add_argument('--seed-posts', type=int, default=2000)
+        parser.add_argument('--seed-groups', type=int, default=10)
+        parser.add_argument('--seed-comments', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            context = seed(
+                options['seed_users'], options['seed_posts'],
+                options['seed_groups'], options['seed_comments'],
+            )
+        else:
+            context = load_context()
+        if not context['usernames'] or not context['post_ids']:
+            raise CommandError('Нет данных для прогона: запустите с --seed')
+        server = None
+        url = options['url']
+        if url is None:
+            url = f'http://127.0.0.1:{options["port"]}'
+            server = self.start_server(options['port'], url)
+        try:
+            for users in options['users']:
+                self.run(url, users, context, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    def start_server(self, port, url):
+        server = subprocess.Popen(
+            [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}',
+             '--noreload'],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for _ in range(100):
+            try:
+                requests.get(url + '/about/author/', timeout=1)
+                return server
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError('Сервер не запустился')
+
+    def run(self, url, users, context, options):
+        logged_in = users - round(users * options['anonymous'])
+        sessions = login_sessions(
+            random.sample(
+                context['usernames'], min(logged_in, len(context['usernames']))
+            )
+        )
+        sessions += [None] * (users - len(sessions))
+        stats = Stats()
+        elapsed = run_stage(
+            [VirtualUser(url, stats, key, context) for key in sessions],
+            options['duration'],
+            SCENARIOS,
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Пользователей: {users}, {elapsed:.1f} с'
+        ))
+        self.stdout.write(
+            f'{"эндпоинт":<16}{"запр":>7}{"ошиб":>6}{"запр/с":>8}'
+            f'{"p50":>8}{"p95":>8}{"p99":>8}{"max":>8}'
+        )
+        for name, count, errors, rps, p50, p95, p99, slowest in (
+            stats.report(elapsed)
+        ):
+            self.stdout.write(
+                f'{name:<16}{count:>7}{errors:>6}{rps:>8.1f}'
+                f'{p50:>8.1f}{p95:>8.1f}{p99:>8.1f}{slowest:>8.1f}'
+            )
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import get_shards
+from posts.models import Group, Post
+from posts.moderation import delete_by_author, move_to_group, purge_comments
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Массовая модерация: удаление по автору, перенос, чистка'
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group(required=True)
+        action.add_argument(
+            '--delete-author', metavar='USERNAME', nargs='+',
+            help='Удалить все посты и комментарии авторов'
+        )
+        action.add_argument(
+            '--purge-comments', metavar='REGEX',
+            help='Удалить комментарии, текст которых подходит под шаблон'
+        )
+        action.add_argument(
+            '--move-to', metavar='SLUG',
+            help='Перенести посты в группу ("-" — убрать из группы)'
+        )
+        parser.add_argument(
+            '--author', help='Для --move-to: только посты этого автора'
+        )
+        parser.add_argument(
+            '--from-group', metavar='SLUG',
+            help='Для --move-to: только посты из этой группы'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Сколько строк обрабатывать за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if options['delete_author']:
+            authors = User.objects.filter(
+                username__in=options['delete_author']
+            ).values_list('pk', flat=True)
+            progress = delete_by_author(authors, chunk_size)
+        elif options['purge_comments'] is not None:
+            progress = purge_comments(options['purge_comments'], chunk_size)
+        else:
+            progress = self.move(options, chunk_size)
+        done = {}
+        for part, count in progress:
+            done[part] = count
+            self.stdout.write(f'{part}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {sum(done.values())}'
+        ))
+
+    def move(self, options, chunk_size):
+        group = None
+        if options['move_to'] != '-':
+            group = self.get_group(options['move_to'])
+        filters = {}
+        if options['author']:
+            filters['author__username'] = options['author']
+        if options['from_group']:
+            filters['group'] = self.get_group(options['from_group'])
+        if not filters:
+            raise CommandError(
+                'Для --move-to укажите --author или --from-group'
+            )
+        for alias in get_shards():
+            posts = Post.objects.using(alias).filter(**filters)
+            for moved in move_to_group(posts, group, chunk_size):
+                yield alias, moved
+
+    def get_group(self, slug):
+        try:
+            return Group.objects.get(slug=slug)
+        except Group.DoesNotExist:
+            raise CommandError(f'Группа {slug} не найдена')
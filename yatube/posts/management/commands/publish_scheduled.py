@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.scheduling import next_due, publish_due
+
+
+class Command(BaseCommand):
+    help = 'Публикует отложенные посты, время которых наступило'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько постов публиковать одним UPDATE'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к ближайшей публикации'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60,
+            help='Наибольшая пауза между проверками, секунд'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for alias, published in publish_due(options['batch_size']):
+                self.stdout.write(f'{alias}: опубликовано {published}')
+            if not options['loop']:
+                break
+            # Спим до ближайшего поста, но не дольше interval: новые
+            # отложенные посты могли появиться за это время
+            pause = options['interval']
+            due = next_due()
+            if due is not None:
+                pause = min(pause, (due - timezone.now()).total_seconds())
+            time.sleep(max(pause, 0.5))
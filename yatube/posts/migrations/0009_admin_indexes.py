@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:41
+
+from django.db import migrations, models
+
+SEARCH_INDEXES = (
+    ('posts_post_text_search', 'posts_post'),
+    ('posts_comment_text_search', 'posts_comment'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    # Полнотекстовый индекс для поиска в админке (core.admin), только PG
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin '
+            f"(to_tsvector('russian'::regconfig, COALESCE(text, '')))"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата добавления'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата публикации'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+BATCH_SIZE = 1000
+# Копия разбора из posts.tags на момент миграции: его правки не должны
+# менять уже применённую миграцию
+HASHTAG_RE = re.compile(r'(?<![\w#])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@(\w+(?:[.+-]\w+)*)')
+
+
+def extract_tags(text):
+    return {
+        *('#' + name.casefold()[:100] for name in HASHTAG_RE.findall(text)),
+        *('@' + name for name in MENTION_RE.findall(text) if len(name) <= 150),
+    }
+
+
+def fill_tags(apps, schema_editor):
+    # Теги уже опубликованных постов: дальше их разбирает сигнал
+    alias = schema_editor.connection.alias
+    Post = apps.get_model('posts', 'Post')
+    PostTag = apps.get_model('posts', 'PostTag')
+    posts = Post.objects.using(alias).order_by('pk')
+    last = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last).values_list(
+            'pk', 'text', 'pub_date'
+        )[:BATCH_SIZE])
+        if not batch:
+            return
+        PostTag.objects.using(alias).bulk_create(
+            PostTag(post_id=pk, tag=tag, pub_date=pub_date)
+            for pk, text, pub_date in batch
+            for tag in extract_tags(text)
+        )
+        last = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=160, verbose_name='Тег')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', 'pub_date'], name='posts_tag_pub_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='posttag',
+            unique_together={('post', 'tag')},
+        ),
+        migrations.RunPython(fill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_scheduled_publishing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardedId',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+    ]
@@ -11,7 +11,8 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     author = models.ForeignKey(
         User,
@@ -33,6 +34,14 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    # Отложенная публикация: пост скрыт из лент, пока posts.scheduling
+    # не опубликует его и не перенесёт publish_at в pub_date
+    publish_at = models.DateTimeField(
+        'Опубликовать',
+        blank=True,
+        null=True
+    )
+    is_published = models.BooleanField('Опубликован', default=True)
 
     def __str__(self):
         return self.text[:15]
@@ -40,6 +49,18 @@ class Post(models.Model):
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('is_published', 'pub_date'),
+                name='posts_post_published_idx'
+            ),
+            # Только ждущие публикации: планировщик не читает остальные
+            models.Index(
+                fields=('publish_at',),
+                name='posts_post_due_idx',
+                condition=models.Q(is_published=False)
+            ),
+        )
 
 
 class Group(models.Model):
@@ -69,7 +90,8 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(
         verbose_name='Дата добавления',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
 
 
@@ -84,3 +106,154 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE
     )
+
+
+class PostTag(models.Model):
+    """Хэштег (#тег) или упоминание (@username) из текста поста.
+
+    Разбирается один раз при сохранении поста (см. posts.tags) и лежит в
+    шарде поста. pub_date скопирована из поста, чтобы страница тега
+    читалась по индексу (tag, pub_date) без соединения с постами.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tags'
+    )
+    tag = models.CharField('Тег', max_length=160)
+    pub_date = models.DateTimeField('Дата публикации')
+
+    def __str__(self):
+        return self.tag
+
+    class Meta:
+        unique_together = ('post', 'tag')
+        indexes = (
+            models.Index(
+                fields=('tag', 'pub_date'), name='posts_tag_pub_date_idx'
+            ),
+        )
+
+
+class Notification(models.Model):
+    """Событие для пользователя: комментарий к его посту или подписка.
+
+    Пост хранится номером, а не ключом: он может лежать в другом шарде
+    или уже в архиве.
+    """
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    KINDS = (
+        (COMMENT, 'Комментарий'),
+        (FOLLOW, 'Подписка'),
+    )
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор события'
+    )
+    kind = models.CharField('Тип', max_length=16, choices=KINDS)
+    post_id = models.IntegerField('ID поста', blank=True, null=True)
+    created = models.DateTimeField(
+        'Дата события',
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        ordering = ('-pk',)
+        indexes = (
+            models.Index(
+                fields=('recipient', 'id'), name='posts_notif_recipient_idx'
+            ),
+        )
+
+
+class NotificationCounter(models.Model):
+    """Хранимый счётчик непрочитанных: шапка не считает уведомления.
+
+    Прочитанными считаются уведомления с pk не больше last_read, поэтому
+    «прочитать все» — один UPDATE этой строки.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField('Непрочитанных', default=0)
+    last_read = models.PositiveIntegerField(
+        'Последнее прочитанное', default=0
+    )
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы в архив.
+
+    Ключи на пользователя и группу без ограничений в БД, чтобы архив мог
+    жить в отдельной базе POSTS_ARCHIVE_DB.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        db_constraint=False,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'архивный пост'
+        verbose_name_plural = 'архивные посты'
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='archived_comments'
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата добавления')
+
+    class Meta:
+        ordering = ('created',)
+
+
+class ShardedId(models.Model):
+    """Строка общей последовательности id постов и комментариев.
+
+    Лежит только в основной базе; нужна при нескольких шардах, чтобы id
+    не пересекались (см. posts.repository).
+    """
@@ -0,0 +1,135 @@
+"""Массовая модерация пачками UPDATE/DELETE по ключам.
+
+Посты удаляются без Collector: комментарии и теги пачки удаляются
+своими DELETE, затем сами посты — последним, без загрузки объектов и
+сигналов на каждый пост. Каждая пачка — своя короткая транзакция, поэтому база
+не блокируется надолго. Сигналов нет, поэтому карточки и RSS-ленты
+затронутых постов сбрасываются здесь же. Функции — генераторы: после
+каждой пачки они отдают число обработанных строк.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from core.routers import get_shards, use_primary
+
+from . import feeds
+from .archive import archive_db
+from .cards import bump_versions
+from .models import ArchivedComment, ArchivedPost, Comment, Post, PostTag
+
+
+def chunks(queryset, chunk_size=None):
+    """Ключи queryset пачками по возрастанию pk, без OFFSET."""
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        with use_primary():
+            pks = list(page[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last = pks[-1]
+
+
+def delete_posts(queryset, chunk_size=None):
+    """Удаляет посты queryset вместе с комментариями к ним."""
+    using = queryset.db
+    deleted = 0
+    for pks in chunks(queryset, chunk_size):
+        feeds.bump_posts(using, pks)
+        with transaction.atomic(using=using):
+            Comment.objects.using(using).filter(post_id__in=pks).delete()
+            PostTag.objects.using(using).filter(post_id__in=pks).delete()
+            # Комментарии и теги уже удалены, других ссылок на пост нет
+            Post.objects.using(using).filter(pk__in=pks)._raw_delete(using)
+        deleted += len(pks)
+        yield deleted
+
+
+def delete_comments(queryset, chunk_size=None):
+    using = queryset.db
+    deleted = 0
+    for pks in chunks(queryset, chunk_size):
+        queryset.model.objects.using(using).filter(pk__in=pks).delete()
+        deleted += len(pks)
+        yield deleted
+
+
+def delete_archived_posts(queryset, chunk_size=None):
+    using = queryset.db
+    deleted = 0
+    for pks in chunks(queryset, chunk_size):
+        with transaction.atomic(using=using):
+            ArchivedComment.objects.using(using).filter(
+                post_id__in=pks
+            ).delete()
+            ArchivedPost.objects.using(using).filter(
+                pk__in=pks
+            )._raw_delete(using)
+        deleted += len(pks)
+        yield deleted
+
+
+def delete_by_author(author_ids, chunk_size=None):
+    """Все посты и комментарии авторов: во всех шардах и в архиве.
+
+    Отдаёт (что удаляется, удалено в этой части).
+    """
+    author_ids = list(author_ids)
+    archive = archive_db()
+    parts = []
+    for alias in get_shards():
+        parts += [
+            ('comments', delete_comments(
+                Comment.objects.using(alias).filter(author_id__in=author_ids),
+                chunk_size,
+            )),
+            ('posts', delete_posts(
+                Post.objects.using(alias).filter(author_id__in=author_ids),
+                chunk_size,
+            )),
+        ]
+    parts += [
+        ('archived comments', delete_comments(
+            ArchivedComment.objects.using(archive).filter(
+                author_id__in=author_ids
+            ),
+            chunk_size,
+        )),
+        ('archived posts', delete_archived_posts(
+            ArchivedPost.objects.using(archive).filter(
+                author_id__in=author_ids
+            ),
+            chunk_size,
+        )),
+    ]
+    for name, progress in parts:
+        for deleted in progress:
+            yield name, deleted
+
+
+def move_to_group(queryset, group, chunk_size=None):
+    """Переносит посты в группу (None — убрать из группы)."""
+    using = queryset.db
+    moved = 0
+    target = () if group is None else (feeds.group_scope(group.slug),)
+    for pks in chunks(queryset, chunk_size):
+        feeds.bump_posts(using, pks, *target)
+        Post.objects.using(using).filter(pk__in=pks).update(group=group)
+        # update() не шлёт post_save: сбрасываем карточки сами
+        bump_versions('post', pks)
+        moved += len(pks)
+        yield moved
+
+
+def purge_comments(pattern, chunk_size=None):
+    """Удаляет комментарии с текстом по регулярному выражению.
+
+    Отдаёт (шард, удалено в шарде).
+    """
+    for alias in get_shards():
+        queryset = Comment.objects.using(alias).filter(text__regex=pattern)
+        for deleted in delete_comments(queryset, chunk_size):
+            yield alias, deleted
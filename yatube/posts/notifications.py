@@ -0,0 +1,135 @@
+"""Уведомления о комментариях и подписках.
+
+Событие пишется одной строкой Notification при создании комментария или
+подписки, и в той же транзакции увеличивается хранимый счётчик
+непрочитанных получателя; счётчик в кэше растёт только после коммита.
+Шапка сайта читает счётчик из кэша, а при промахе — одной строкой по
+первичному ключу и кладёт её в кэш ненадолго, поэтому на чтение ничего
+не агрегируется. Старые уведомления удаляет compact_notifications,
+заодно пересчитывая счётчики затронутых пользователей.
+"""
+import datetime as dt
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.routers import use_primary
+from core.tasks import task
+
+from .models import Notification, NotificationCounter
+from .moderation import chunks
+
+UNREAD_KEY = 'notifications_unread:{}'
+
+
+def _increment(user_id):
+    counters = NotificationCounter.objects.filter(user_id=user_id)
+    if counters.update(unread=F('unread') + 1):
+        return
+    try:
+        with transaction.atomic():
+            NotificationCounter.objects.create(user_id=user_id, unread=1)
+    except IntegrityError:
+        # Строку счётчика одновременно создал другой запрос
+        counters.update(unread=F('unread') + 1)
+
+
+def _incr_cached(user_id):
+    try:
+        cache.incr(UNREAD_KEY.format(user_id))
+    except ValueError:
+        # Значения нет в кэше: следующее чтение возьмёт его из базы
+        pass
+
+
+def notify(recipient_id, actor_id, kind, post_id=None):
+    if recipient_id == actor_id:
+        return
+    with transaction.atomic():
+        # Сначала счётчик: его блокировка упорядочивает нас с mark_all_read
+        _increment(recipient_id)
+        Notification.objects.create(
+            recipient_id=recipient_id, actor_id=actor_id, kind=kind,
+            post_id=post_id,
+        )
+        # Откат внешней транзакции не должен оставить лишнее в кэше
+        transaction.on_commit(lambda: _incr_cached(recipient_id))
+
+
+def unread_count(user_id):
+    """Число непрочитанных: из кэша или одной строкой счётчика."""
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        # Реплика может отдать счётчик до «прочитать все»
+        with use_primary():
+            count = NotificationCounter.objects.filter(
+                user_id=user_id
+            ).values_list('unread', flat=True).first() or 0
+        # Между чтением и записью в кэш мог прийти incr, которого мы не
+        # видим: поэтому значение из базы живёт в кэше недолго
+        cache.add(key, count, settings.NOTIFICATIONS_MISS_CACHE_TIMEOUT)
+    return count
+
+
+def last_read(user_id):
+    return NotificationCounter.objects.filter(user_id=user_id).values_list(
+        'last_read', flat=True
+    ).first() or 0
+
+
+def mark_all_read(user_id):
+    """Одним UPDATE отмечает прочитанными все уведомления пользователя."""
+    newest = Notification.objects.filter(recipient_id=user_id).order_by(
+        '-pk'
+    ).values('pk')[:1]
+    NotificationCounter.objects.filter(user_id=user_id).update(
+        unread=0, last_read=Coalesce(Subquery(newest), F('last_read'))
+    )
+    cache.set(
+        UNREAD_KEY.format(user_id), 0, settings.NOTIFICATIONS_CACHE_TIMEOUT
+    )
+
+
+def recount(user_ids):
+    """Пересчитывает счётчики пользователей по оставшимся уведомлениям."""
+    unread = Notification.objects.filter(
+        recipient=OuterRef('user'), pk__gt=OuterRef('last_read')
+    ).order_by().values('recipient').annotate(
+        count=Count('pk')
+    ).values('count')
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(
+        unread=Coalesce(Subquery(unread), 0)
+    )
+    cache.delete_many([UNREAD_KEY.format(user_id) for user_id in user_ids])
+
+
+def compact_notifications(days=None, chunk_size=None):
+    """Пачками удаляет уведомления старше days дней.
+
+    Генератор: после каждой пачки отдаёт число удалённых строк.
+    """
+    if days is None:
+        days = settings.NOTIFICATIONS_KEEP_DAYS
+    cutoff = timezone.now() - dt.timedelta(days=days)
+    old = Notification.objects.filter(created__lt=cutoff)
+    deleted = 0
+    for pks in chunks(old, chunk_size):
+        with use_primary(), transaction.atomic():
+            batch = Notification.objects.filter(pk__in=pks)
+            recipients = set(batch.values_list('recipient_id', flat=True))
+            batch.delete()
+            recount(recipients)
+        deleted += len(pks)
+        yield deleted
+
+
+@task
+def compact_old_notifications(days=None):
+    """Фоновая чистка: ставится в очередь по расписанию, например cron."""
+    for _ in compact_notifications(days):
+        pass
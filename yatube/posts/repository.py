@@ -0,0 +1,241 @@
+"""Доступ к постам и комментариям с учётом шардирования по автору.
+
+Посты автора и комментарии к ним лежат в одном шарде из POSTS_SHARDS,
+который выбирается стабильным хэшем author_id. Пользователи, группы и
+подписки реплицируются во все шарды. С одним шардом функции возвращают
+обычные QuerySet и чтение по-прежнему распределяет роутер реплик.
+
+При нескольких шардах id постов и комментариев не берутся из
+автоинкремента шарда: номер выдаёт общая последовательность ShardedId
+в основной базе, а id = номер * SHARD_SLOTS + индекс шарда. Так id не
+пересекаются между шардами и в архиве, а шард поста виден по его id.
+
+Посты старше POSTS_ARCHIVE_AFTER_DAYS лежат в архиве (см. posts.archive):
+профиль и страница поста прозрачно дочитывают их оттуда, а общие ленты
+работают только с горячими таблицами.
+"""
+import heapq
+import zlib
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.http import Http404
+
+from core.routers import PRIMARY_DB, get_shards
+
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow, Post,
+                     ShardedId)
+
+# Сколько шардов можно завести, не меняя уже выданные id
+SHARD_SLOTS = 64
+
+
+def is_sharded():
+    return len(get_shards()) > 1
+
+
+def shard_for_author(author_id):
+    """Стабильный номер шарда: не зависит от процесса и PYTHONHASHSEED."""
+    shards = get_shards()
+    return shards[zlib.crc32(str(author_id).encode()) % len(shards)]
+
+
+def assign_id(instance, alias):
+    """Выдаёт новому посту или комментарию id, уникальный во всех шардах."""
+    shards = get_shards()
+    if instance.pk is None and is_sharded() and alias in shards:
+        number = ShardedId.objects.using(PRIMARY_DB).create().pk
+        instance.pk = number * SHARD_SLOTS + shards.index(alias)
+
+
+def shard_for_id(object_id):
+    """Шард поста или комментария по его id; None, если такого нет."""
+    shards = get_shards()
+    if not is_sharded():
+        return shards[0]
+    index = object_id % SHARD_SLOTS
+    return shards[index] if index < len(shards) else None
+
+
+def _on_shard(queryset, alias):
+    return queryset.using(alias) if is_sharded() else queryset
+
+
+class MergedFeed:
+    """Scatter-gather ленты по шардам с k-way слиянием по pub_date.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    для страницы [start:stop] из каждого шарда читается не больше stop
+    постов, а heapq.merge сливает уже отсортированные куски.
+    """
+
+    ordered = True
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def _merge(self, parts):
+        return heapq.merge(
+            *parts, key=attrgetter('pub_date', 'pk'), reverse=True
+        )
+
+    def __iter__(self):
+        return self._merge(self.querysets)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        if key.stop is None:
+            return list(islice(self, start, None))
+        parts = [queryset[:key.stop] for queryset in self.querysets]
+        return list(islice(self._merge(parts), start, key.stop))
+
+
+class ChainedFeed:
+    """Горячие посты, за ними архивные: архив всегда старше горячего слоя.
+
+    Как и MergedFeed, поддерживает count() и срезы для Paginator.
+    """
+
+    ordered = True
+
+    def __init__(self, *parts):
+        self.parts = parts
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [part.count() for part in self.parts]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        for part in self.parts:
+            yield from part
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        result = []
+        for part, size in zip(self.parts, self.counts()):
+            if start < size and stop > 0:
+                result.extend(part[max(start, 0):min(stop, size)])
+            start -= size
+            stop -= size
+        return result
+
+
+def _archive(model=ArchivedPost):
+    if settings.POSTS_ARCHIVE_DB == PRIMARY_DB:
+        return model.objects.all()
+    return model.objects.db_manager(settings.POSTS_ARCHIVE_DB).all()
+
+
+def feed(**filters):
+    """Лента постов всех авторов с фильтрами, например group=group.
+
+    Отложенные посты в ленты не попадают до публикации.
+    """
+    filters['is_published'] = True
+    if not is_sharded():
+        return Post.objects.filter(**filters).select_related(
+            'author', 'group'
+        )
+    return MergedFeed([
+        Post.objects.using(alias).filter(**filters).select_related(
+            'author', 'group'
+        )
+        for alias in get_shards()
+    ])
+
+
+def author_posts(author_id):
+    """Все опубликованные посты автора: горячий шард, затем архив."""
+    posts = Post.objects.filter(
+        author_id=author_id, is_published=True
+    ).select_related('author', 'group')
+    archived = _archive().filter(author_id=author_id).prefetch_related(
+        'author', 'group'
+    )
+    return ChainedFeed(
+        _on_shard(posts, shard_for_author(author_id)), archived
+    )
+
+
+def scheduled_posts(author_id):
+    """Отложенные посты автора по времени публикации."""
+    posts = Post.objects.filter(
+        author_id=author_id, is_published=False
+    ).order_by('publish_at')
+    return _on_shard(posts, shard_for_author(author_id))
+
+
+def following_posts(user):
+    """Лента подписок: авторы берутся из Follow, посты — из их шардов."""
+    authors = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    if not is_sharded():
+        return feed(author__in=authors)
+    return feed(author__in=list(authors))
+
+
+def get_post_or_404(post_id):
+    """Пост из шарда, который записан в его id."""
+    alias = shard_for_id(post_id)
+    post = alias and _on_shard(
+        Post.objects.select_related('author', 'group'), alias
+    ).filter(pk=post_id).first()
+    if post is None:
+        raise Http404('No Post matches the given query.')
+    return post
+
+
+def get_any_post_or_404(post_id):
+    """Пост из горячих таблиц, а если его там нет — из архива."""
+    try:
+        return get_post_or_404(post_id)
+    except Http404:
+        post = _archive().filter(pk=post_id).first()
+        if post is None:
+            raise
+        return post
+
+
+def post_comments(post):
+    if isinstance(post, ArchivedPost):
+        return _archive(ArchivedComment).filter(post=post).prefetch_related(
+            'author'
+        )
+    comments = Comment.objects.filter(post=post).select_related('author')
+    return _on_shard(comments, post._state.db)
+
+
+def save_post(post):
+    alias = shard_for_author(post.author_id)
+    assign_id(post, alias)
+    post.save(using=alias, force_insert=True)
+    return post
+
+
+def save_comment(comment):
+    """Комментарий пишется в шард поста, а не в базу его автора."""
+    alias = comment.post._state.db
+    assign_id(comment, alias)
+    comment.save(using=alias, force_insert=True)
+    return comment
@@ -0,0 +1,119 @@
+"""Публикация отложенных постов.
+
+Ждущие посты (is_published=False) лежат в частичном индексе по
+publish_at, поэтому поиск наступивших читает только их начало, а не всю
+таблицу постов. Пачка публикуется одним UPDATE: is_published=True и
+pub_date — момент публикации, так что пост встаёт в начало лент, даже
+если планировщик опоздал, а sitemap и RSS видят его новым. UPDATE
+не посылает сигналов, поэтому теги, карточки, RSS-ленты и sitemap
+обновляются здесь же, как при обычном сохранении поста.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Task
+from core.routers import get_shards, use_primary
+from core.tasks import task
+
+from .cards import bump_versions
+from .feeds import bump_posts
+from .models import Post
+from .sitemaps import schedule_refresh
+from .tags import sync_tags
+
+
+def due_posts(alias, now=None):
+    """Наступившие отложенные посты шарда по частичному индексу."""
+    return Post.objects.using(alias).filter(
+        is_published=False, publish_at__lte=now or timezone.now()
+    ).order_by('publish_at')
+
+
+def publish_batch(alias, batch_size, now=None):
+    """Публикует одну пачку наступивших постов шарда. Возвращает её размер.
+
+    На PostgreSQL строки пачки захватываются с skip_locked, и несколько
+    планировщиков не публикуют одно и то же. SQLite select_for_update
+    не поддерживает, Django его там просто опускает: два планировщика
+    могут опубликовать один пост дважды, поэтому запускайте один.
+    """
+    with transaction.atomic(using=alias):
+        pks = list(
+            due_posts(alias, now).select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return 0
+        Post.objects.using(alias).filter(pk__in=pks).update(
+            is_published=True, pub_date=timezone.now()
+        )
+    with use_primary():
+        for post in Post.objects.using(alias).filter(pk__in=pks):
+            sync_tags(post)
+        bump_versions('post', pks)
+        bump_posts(alias, pks)
+    schedule_refresh()
+    return len(pks)
+
+
+def publish_due(batch_size=None, now=None):
+    """Публикует все наступившие посты во всех шардах.
+
+    Генератор: после каждой пачки отдаёт (шард, опубликовано в шарде).
+    """
+    batch_size = batch_size or settings.SCHEDULED_BATCH_SIZE
+    for alias in get_shards():
+        published = 0
+        while True:
+            count = publish_batch(alias, batch_size, now)
+            if not count:
+                break
+            published += count
+            yield alias, published
+
+
+def next_due():
+    """Ближайшее время публикации среди всех шардов или None."""
+    with use_primary():
+        times = [
+            Post.objects.using(alias).filter(is_published=False).order_by(
+                'publish_at'
+            ).values_list('publish_at', flat=True).first()
+            for alias in get_shards()
+        ]
+    times = [publish_at for publish_at in times if publish_at is not None]
+    return min(times, default=None)
+
+
+@task
+def publish_scheduled():
+    """Фоновая публикация; run_worker выполняет её как обычную задачу."""
+    for _ in publish_due():
+        pass
+
+
+def schedule_task(publish_at):
+    """Ставит publish_scheduled на publish_at, если задачи на него нет.
+
+    Посты с одним временем и повторные сохранения делят одну задачу.
+    """
+    with use_primary():
+        if not Task.objects.filter(
+            name=publish_scheduled.name, run_at=publish_at
+        ).exists():
+            publish_scheduled.delay(eta=publish_at)
+
+
+def cancel_task(publish_at):
+    """Снимает ещё не взятую задачу на publish_at, если её никто не ждёт."""
+    with use_primary():
+        if not any(
+            Post.objects.using(alias).filter(
+                is_published=False, publish_at=publish_at
+            ).exists()
+            for alias in get_shards()
+        ):
+            Task.objects.filter(
+                name=publish_scheduled.name, run_at=publish_at, attempts=0
+            ).delete()
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import feeds, notifications, repository, scheduling, sitemaps, tags
+from .cards import bump_version
+from .models import Comment, Follow, Group, Notification, Post
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся в карточке поста
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def assign_sharded_id(sender, instance, using, **kwargs):
+    # Посты и комментарии, созданные в обход posts.repository
+    repository.assign_id(instance, using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    bump_version('post', instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # При переносе поста нужно обновить и ленту прежней группы
+    instance._loaded_group_id = instance.group_id
+    # __dict__, а не атрибут: отложенное поле не подгружается запросом
+    instance._loaded_text = instance.__dict__.get('text')
+    instance._loaded_published = instance.__dict__.get('is_published')
+    instance._loaded_publish_at = instance.__dict__.get('publish_at')
+
+
+@receiver(post_save, sender=Post)
+def update_tags(sender, instance, created, **kwargs):
+    # Теги разбираются только при изменении текста или публикации
+    if (
+        created
+        or instance.text != instance._loaded_text
+        or instance.is_published != instance._loaded_published
+    ):
+        tags.sync_tags(instance)
+        instance._loaded_text = instance.text
+        instance._loaded_published = instance.is_published
+
+
+@receiver(post_save, sender=Post)
+def schedule_publication(sender, instance, created, **kwargs):
+    # Задача к сроку публикации; опоздавшие посты подберёт и цикл
+    # publish_scheduled --loop
+    previous = None if created else instance._loaded_publish_at
+    if not created and instance.publish_at == previous:
+        return
+    if previous is not None:
+        # Прежнее время могло остаться без постов: его задача не нужна
+        scheduling.cancel_task(previous)
+    if not instance.is_published and instance.publish_at is not None:
+        scheduling.schedule_task(instance.publish_at)
+    instance._loaded_publish_at = instance.publish_at
+
+
+@receiver(post_save, sender=Post)
+def refresh_sitemaps(sender, instance, **kwargs):
+    if instance.is_published:
+        sitemaps.schedule_refresh()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feeds(sender, instance, **kwargs):
+    group_ids = {instance.group_id, instance._loaded_group_id} - {None}
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True
+    ) if group_ids else []
+    feeds.bump(
+        feeds.index_scope(),
+        feeds.author_scope(instance.author.username),
+        *(feeds.group_scope(slug) for slug in slugs),
+    )
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or CARD_USER_FIELDS & set(update_fields):
+        bump_version('author', instance.pk)
+        feeds.bump(feeds.author_scope(instance.username))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    bump_version('group', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, **kwargs):
+    if created:
+        notifications.notify(
+            instance.post.author_id, instance.author_id,
+            Notification.COMMENT, instance.post_id,
+        )
+
+
+@receiver(post_save, sender=Follow)
+def notify_follow(sender, instance, created, **kwargs):
+    if created:
+        notifications.notify(
+            instance.author_id, instance.user_id, Notification.FOLLOW
+        )
@@ -0,0 +1,283 @@
+"""Sitemap постов, групп и авторов в виде готовых .xml.gz файлов.
+
+Каждый раздел режется на куски по диапазонам первичного ключа
+SITEMAP_CHUNK_SIZE: кусок n содержит ключи [n * size, (n + 1) * size).
+Границы кусков не зависят от данных, поэтому новые записи меняют только
+последние куски, и обновление пересобирает их, начиная с куска, где
+кончилась прошлая сборка, плюс куски постов, опубликованных по
+расписанию после неё. Внутри куска ключи читаются пачками по
+условию pk > последнего (keyset), из всех шардов и архива сразу, и
+XML пишется в gzip потоком. Файлы заменяются атомарно, состояние
+сборки лежит в manifest.json рядом с ними. Удалённые записи уходят из
+файлов при полной сборке (--full).
+
+Сохранение опубликованного поста и публикация по расписанию ставят
+refresh_sitemaps не чаще раза в SITEMAP_REFRESH_DELAY секунд.
+"""
+import datetime as dt
+import gzip
+import heapq
+import json
+import os
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from core.routers import get_shards, use_primary
+from core.tasks import task
+
+from .archive import archive_db
+from .models import ArchivedPost, Group, Post
+
+User = get_user_model()
+
+INDEX_NAME = 'sitemap.xml'
+REFRESH_KEY = 'sitemaps_refresh_queued'
+MANIFEST_NAME = 'manifest.json'
+KEYSET_BATCH = 1000
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+
+
+def keyset(queryset, low, high):
+    """Строки queryset с pk в [low, high) по возрастанию pk, пачками."""
+    queryset = queryset.filter(pk__gte=low, pk__lt=high).order_by('pk')
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(page[:KEYSET_BATCH])
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][0]
+
+
+class Section:
+    """Раздел sitemap: источники строк (pk, ключ URL[, lastmod])."""
+    name = None
+
+    def sources(self):
+        raise NotImplementedError
+
+    def location(self, key):
+        raise NotImplementedError
+
+    def max_pk(self):
+        return max(
+            (source.order_by('-pk').values_list('pk', flat=True).first() or 0
+             for source in self.sources()),
+            default=0,
+        )
+
+    def changed_since(self, moment):
+        """pk записей, попавших в раздел после moment вне порядка pk."""
+        return []
+
+    def rows(self, low, high):
+        return heapq.merge(
+            *(keyset(source, low, high) for source in self.sources())
+        )
+
+
+class PostSection(Section):
+    name = 'posts'
+
+    def published(self):
+        return [
+            Post.objects.using(alias).filter(is_published=True)
+            for alias in get_shards()
+        ]
+
+    def sources(self):
+        return [
+            posts.values_list('pk', 'pk', 'pub_date')
+            for posts in self.published()
+        ] + [
+            ArchivedPost.objects.using(archive_db()).values_list(
+                'pk', 'pk', 'pub_date'
+            )
+        ]
+
+    def changed_since(self, moment):
+        # Отложенный пост публикуется позже постов с большими pk
+        return [
+            pk for posts in self.published()
+            for pk in posts.filter(pub_date__gte=moment).values_list(
+                'pk', flat=True
+            )
+        ]
+
+    def location(self, key):
+        return reverse('posts:post_detail', args=(key,))
+
+
+class GroupSection(Section):
+    name = 'groups'
+
+    def sources(self):
+        return [Group.objects.values_list('pk', 'slug')]
+
+    def location(self, key):
+        return reverse('posts:group_list', args=(key,))
+
+
+class AuthorSection(Section):
+    name = 'authors'
+
+    def sources(self):
+        return [
+            User.objects.filter(is_active=True).values_list('pk', 'username')
+        ]
+
+    def location(self, key):
+        return reverse('posts:profile', args=(key,))
+
+
+SECTIONS = (PostSection(), GroupSection(), AuthorSection())
+
+
+def chunk_name(section, number):
+    return f'sitemap-{section.name}-{number}.xml.gz'
+
+
+def _replace(path, write):
+    temporary = f'{path}.tmp'
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def write_chunk(section, number):
+    """Пишет кусок потоком в gzip. Возвращает (число URL, lastmod)."""
+    size = settings.SITEMAP_CHUNK_SIZE
+    count, newest = 0, None
+
+    def write(path):
+        nonlocal count, newest
+        # mtime=0: одинаковое содержимое даёт одинаковые байты и ETag
+        with gzip.GzipFile(path, 'wb', mtime=0) as file:
+            file.write(URLSET_OPEN.encode())
+            for _, key, *lastmod in section.rows(
+                number * size, (number + 1) * size
+            ):
+                lastmod = lastmod[0] if lastmod else None
+                url = settings.SITE_URL + section.location(key)
+                entry = f'<url><loc>{escape(url)}</loc>'
+                if lastmod is not None:
+                    entry += f'<lastmod>{lastmod.isoformat()}</lastmod>'
+                    newest = max(newest or lastmod, lastmod)
+                file.write((entry + '</url>\n').encode())
+                count += 1
+            file.write(b'</urlset>\n')
+
+    _replace(os.path.join(settings.SITEMAP_ROOT, chunk_name(section, number)),
+             write)
+    return count, newest
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(settings.SITEMAP_ROOT, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_index(manifest):
+    """Индекс со ссылками на все куски и manifest.json с состоянием."""
+    def write(path):
+        with open(path, 'w') as file:
+            file.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex '
+                'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            )
+            for name in sorted(manifest):
+                for number, lastmod in sorted(
+                    manifest[name]['chunks'].items(), key=lambda i: int(i[0])
+                ):
+                    url = (
+                        settings.SITE_URL + settings.SITEMAP_URL
+                        + f'sitemap-{name}-{number}.xml.gz'
+                    )
+                    entry = f'<sitemap><loc>{escape(url)}</loc>'
+                    if lastmod:
+                        entry += f'<lastmod>{lastmod}</lastmod>'
+                    file.write(entry + '</sitemap>\n')
+            file.write('</sitemapindex>\n')
+
+    _replace(os.path.join(settings.SITEMAP_ROOT, INDEX_NAME), write)
+
+    def write_manifest(path):
+        with open(path, 'w') as file:
+            json.dump(manifest, file)
+
+    _replace(os.path.join(settings.SITEMAP_ROOT, MANIFEST_NAME),
+             write_manifest)
+
+
+def build_sitemaps(full=False):
+    """Собирает изменившиеся куски и индекс.
+
+    Генератор: после каждого куска отдаёт (раздел, номер, число URL).
+    """
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    manifest = {} if full else load_manifest()
+    size = settings.SITEMAP_CHUNK_SIZE
+    # Время до чтения: опубликованное во время сборки попадёт в следующую
+    started = timezone.now().isoformat()
+    with use_primary():
+        for section in SECTIONS:
+            state = manifest.setdefault(
+                section.name, {'max_pk': 0, 'chunks': {}}
+            )
+            max_pk = section.max_pk()
+            first = 0 if full else state['max_pk'] // size
+            numbers = set(range(first, max_pk // size + 1))
+            if not full and 'built' in state:
+                numbers.update(
+                    pk // size for pk in section.changed_since(
+                        dt.datetime.fromisoformat(state['built'])
+                    )
+                )
+            for number in sorted(numbers):
+                count, newest = write_chunk(section, number)
+                if count:
+                    state['chunks'][str(number)] = (
+                        newest.isoformat() if newest else None
+                    )
+                else:
+                    state['chunks'].pop(str(number), None)
+                    os.remove(os.path.join(
+                        settings.SITEMAP_ROOT, chunk_name(section, number)
+                    ))
+                yield section.name, number, count
+            state['max_pk'] = max_pk
+            state['built'] = started
+    write_index(manifest)
+
+
+@task
+def refresh_sitemaps():
+    """Фоновое обновление: только новые куски."""
+    for _ in build_sitemaps():
+        pass
+
+
+def schedule_refresh():
+    """Ставит обновление через SITEMAP_REFRESH_DELAY секунд, если его нет.
+
+    Изменения внутри этого окна подберёт уже поставленная задача. Ставим
+    после коммита: откаченное изменение не должно занять окно.
+    """
+    def enqueue():
+        delay = settings.SITEMAP_REFRESH_DELAY
+        if cache.add(REFRESH_KEY, True, delay):
+            refresh_sitemaps.delay(countdown=delay)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,154 @@
+"""Хэштеги и упоминания постов и страницы тегов с keyset-пагинацией.
+
+Теги разбираются из текста один раз при сохранении поста и хранятся в
+PostTag рядом с постом, в его шарде: '#тег' в нижнем регистре и
+'@username' как есть. Страница тега читает индекс (tag, pub_date) от
+курсора — pub_date и pk последнего поста прошлой страницы — без OFFSET
+и без подсчёта всех строк, поэтому глубокие страницы не дороже первой.
+Архивные и отложенные посты в теги не попадают, как и в общие ленты.
+"""
+import datetime as dt
+import heapq
+import re
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from core.routers import get_shards
+
+from . import repository
+from .models import PostTag
+
+HASHTAG_LENGTH = 100
+HASHTAG_RE = re.compile(r'(?<![\w#])#(\w{1,%d})' % HASHTAG_LENGTH)
+MENTION_RE = re.compile(r'(?<![\w@])@(\w+(?:[.+-]\w+)*)')
+TAGS_RE = re.compile(f'{HASHTAG_RE.pattern}|{MENTION_RE.pattern}')
+CURSOR_RE = re.compile(r'^(\d+)\.(\d+)$')
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def hashtag(name):
+    # casefold может удлинить строку ('ß' → 'ss'): обрезаем уже после него
+    return '#' + name.casefold()[:HASHTAG_LENGTH]
+
+
+def mention(username):
+    return '@' + username
+
+
+def extract_tags(text):
+    """Множество тегов текста: '#тег' и '@username'."""
+    return {
+        *(hashtag(name) for name in HASHTAG_RE.findall(text)),
+        *(mention(name) for name in MENTION_RE.findall(text)
+          if len(name) <= 150),
+    }
+
+
+def link_tags(text):
+    """HTML текста, в котором теги и упоминания стали ссылками."""
+    def link(match):
+        name, username = match.groups()
+        if name is not None:
+            url = reverse('posts:tag_posts', args=(hashtag(name)[1:],))
+        else:
+            url = reverse('posts:profile', args=(username,))
+        return format_html('<a href="{}">{}</a>', url, match.group(0))
+
+    parts = []
+    last = 0
+    for match in TAGS_RE.finditer(text):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(link(match))
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return mark_safe(''.join(parts))
+
+
+def sync_tags(post):
+    """Приводит строки PostTag поста к тегам его текста.
+
+    У отложенного поста тегов нет, пока он не опубликован.
+    """
+    tags = extract_tags(post.text) if post.is_published else set()
+    rows = PostTag.objects.using(post._state.db).filter(post=post)
+    with transaction.atomic(using=post._state.db):
+        rows.exclude(tag__in=tags).delete()
+        existing = set(rows.values_list('tag', flat=True))
+        PostTag.objects.using(post._state.db).bulk_create(
+            PostTag(post=post, tag=tag, pub_date=post.pub_date)
+            for tag in tags - existing
+        )
+
+
+def encode_cursor(pub_date, pk):
+    delta = pub_date - EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 10 ** 6
+    return f'{micros + delta.microseconds}.{pk}'
+
+
+def decode_cursor(cursor):
+    """(pub_date, pk) из курсора или None для первой страницы."""
+    match = CURSOR_RE.match(cursor or '')
+    if match is None:
+        return None
+    micros, pk = map(int, match.groups())
+    try:
+        return EPOCH + dt.timedelta(microseconds=micros), pk
+    except OverflowError:
+        return None
+
+
+class KeysetPage:
+    """Страница ленты для шаблонов: посты и курсор следующей страницы."""
+
+    def __init__(self, posts, next_cursor, is_first):
+        self.object_list = posts
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _tag_rows(tag):
+    if not repository.is_sharded():
+        return [PostTag.objects.filter(tag=tag)]
+    return [PostTag.objects.using(alias).filter(tag=tag)
+            for alias in get_shards()]
+
+
+def tag_page(tag, cursor=None, limit=10):
+    """Страница постов с тегом, начиная после курсора."""
+    after = decode_cursor(cursor)
+    parts = []
+    for rows in _tag_rows(tag):
+        if after is not None:
+            pub_date, pk = after
+            rows = rows.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, post__lt=pk)
+            )
+        parts.append(rows.order_by('-pub_date', '-post').values_list(
+            'pub_date', 'post'
+        )[:limit + 1])
+    keys = list(islice(heapq.merge(*parts, reverse=True), limit + 1))
+    next_cursor = None
+    if len(keys) > limit:
+        next_cursor = encode_cursor(*keys[limit - 1])
+    ids = [pk for _, pk in keys[:limit]]
+    posts = {
+        post.pk: post for post in repository.feed(pk__in=ids)
+    } if ids else {}
+    return KeysetPage(
+        [posts[pk] for pk in ids if pk in posts],
+        next_cursor,
+        is_first=after is None,
+    )
@@ -0,0 +1,18 @@
+from django import template
+
+from posts.cards import render_cards
+from posts.tags import link_tags
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Кэшированные карточки постов, общие для всех лент."""
+    return render_cards(posts)
+
+
+@register.filter
+def tag_links(text):
+    """Хэштеги и упоминания в тексте поста — ссылки."""
+    return link_tags(text)
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+CHANGELISTS = ('post', 'comment', 'follow')
+
+
+class AdminChangelistTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'pass'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='Описание'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = Post.objects.count()
+        for index in range(start, start + count):
+            author = User.objects.create_user(username=f'author{index}')
+            post = Post.objects.create(
+                author=author, text=f'Пост {index}', group=self.group
+            )
+            Comment.objects.create(post=post, author=author, text='Ответ')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def count_queries(self, name):
+        url = reverse(f'admin:posts_{name}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка в админке не зависит от числа строк."""
+        self.add_rows(2)
+        # Первый запрос кэширует пользователя (core.backends)
+        self.count_queries('post')
+        before = {name: self.count_queries(name) for name in CHANGELISTS}
+        self.add_rows(5)
+        for name in CHANGELISTS:
+            with self.subTest(name=name):
+                self.assertEqual(self.count_queries(name), before[name])
+
+    def test_search(self):
+        """Поиск по тексту постов работает и без PostgreSQL."""
+        self.add_rows(2)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'Пост 1'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_estimated_count_for_unfiltered_list(self):
+        """Без фильтров список берёт оценку числа строк, а не COUNT(*)."""
+        self.add_rows(1)
+        url = reverse('admin:posts_post_changelist')
+        with mock.patch('core.admin.estimated_count', return_value=10 ** 6):
+            unfiltered = self.client.get(url)
+            filtered = self.client.get(url, {'q': 'Пост'})
+        self.assertEqual(unfiltered.context['cl'].result_count, 10 ** 6)
+        self.assertEqual(filtered.context['cl'].result_count, 1)
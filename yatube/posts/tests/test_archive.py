@@ -0,0 +1,80 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        cls.old_posts = [
+            Post.objects.create(author=cls.user, text=f'Старый пост {i}')
+            for i in range(3)
+        ]
+        Post.objects.filter(
+            pk__in=[post.pk for post in cls.old_posts]
+        ).update(pub_date=timezone.now() - dt.timedelta(days=400))
+        cls.comment = Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Комментарий'
+        )
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_archive_moves_old_posts_in_batches(self):
+        """Старые посты с комментариями переносятся в архив пачками."""
+        progress = list(archive_posts(days=365, batch_size=2))
+        self.assertEqual(progress, [('default', 2), ('default', 3)])
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old_posts[0].pk
+        )
+
+    def test_batch_queries_do_not_grow_with_posts(self):
+        """Пачка удаляется без запросов на каждый пост."""
+        extra = [
+            Post.objects.create(author=self.user, text=f'Ещё {i}')
+            for i in range(30)
+        ]
+        Post.objects.filter(pk__in=[post.pk for post in extra]).update(
+            pub_date=timezone.now() - dt.timedelta(days=400)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            list(archive_posts(days=365, batch_size=100))
+        self.assertEqual(ArchivedPost.objects.count(), 33)
+        self.assertLess(len(queries), 20)
+
+    def test_views_fall_through_to_archive(self):
+        """Страница поста и профиль читают архив, главная — нет."""
+        list(archive_posts(days=365))
+        old_post = self.old_posts[0]
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': old_post.pk})
+        )
+        self.assertEqual(response.context['post'].text, old_post.text)
+        self.assertEqual(len(response.context['comments']), 1)
+        self.assertEqual(response.context['count_posts'], 4)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+        self.assertEqual(response.context['page_obj'][0], self.new_post)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.new_post])
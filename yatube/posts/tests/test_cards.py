@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.cards import render_cards
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='name', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk
+        )
+        return render_cards([post])[0]
+
+    def test_card_is_cached(self):
+        """Повторный рендер карточки берётся из кэша."""
+        card = self.render()
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        self.assertEqual(self.render(), card)
+        self.assertIn('Тестовый пост', card)
+
+    def test_card_invalidation(self):
+        """Карточка сбрасывается при изменении поста, автора и группы."""
+        self.render()
+        changes = {
+            'Новый текст': (self.post, 'text'),
+            'Лёва': (self.user, 'first_name'),
+            'Новая группа': (self.group, 'title'),
+        }
+        for value, (instance, field) in changes.items():
+            with self.subTest(field=field):
+                setattr(instance, field, value)
+                instance.save()
+                self.assertIn(value, self.render())
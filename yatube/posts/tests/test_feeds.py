@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.moderation import move_to_group
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='Описание'
+        )
+        cls.other = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text='Первый пост', group=self.group
+        )
+
+    def test_feeds_list_posts(self):
+        """RSS и Atom общей ленты, группы и автора содержат пост."""
+        urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+            reverse('posts:group_atom', args=(self.group.slug,)),
+            reverse('posts:author_rss', args=(self.user.username,)),
+            reverse('posts:author_atom', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Первый пост')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_unknown_group(self):
+        url = reverse('posts:group_rss', args=('missing',))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_polling_is_served_from_cache(self):
+        """Повторный опрос не ходит в базу, с ETag отдаётся 304."""
+        url = reverse('posts:group_rss', args=(self.group.slug,))
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), 'Первый пост')
+            not_modified = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_new_post_changes_version(self):
+        """Новый пост сбрасывает ленту."""
+        url = reverse('posts:index_rss')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(author=self.user, text='Второй пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Второй пост')
+
+    def test_moved_post_leaves_old_group_feed(self):
+        """Перенос поста обновляет ленты прежней и новой группы."""
+        old = reverse('posts:group_rss', args=(self.group.slug,))
+        new = reverse('posts:group_rss', args=(self.other.slug,))
+        self.client.get(old)
+        self.client.get(new)
+        self.post.group = self.other
+        self.post.save()
+        self.assertNotContains(self.client.get(old), 'Первый пост')
+        self.assertContains(self.client.get(new), 'Первый пост')
+        list(move_to_group(Post.objects.all(), self.group))
+        self.assertContains(self.client.get(old), 'Первый пост')
+        self.assertNotContains(self.client.get(new), 'Первый пост')
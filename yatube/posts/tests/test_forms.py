@@ -1,3 +1,6 @@
+import hashlib
+import io
+import os
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -7,6 +10,7 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.forms import CommentForm, PostForm
 from posts.models import Comment, Group, Post
@@ -71,6 +75,7 @@ class PostFormTests(TestCase):
             content=small_gif,
             content_type='image/gif'
         )
+        digest = hashlib.sha256(small_gif).hexdigest()
         form_data = {
             'text': 'Тестовый пост',
             'group': self.group.id,
@@ -88,13 +93,39 @@ class PostFormTests(TestCase):
                 author=PostFormTests.user,
                 text=form_data['text'],
                 group=self.group.id,
-                image=f'posts/{form_data["image"]}',
+                image=f'posts/{digest[:2]}/{digest}.jpg',
             ).exists()
         )
         new_post = Post.objects.latest('id')
         self.assertEqual(new_post.author, PostFormTests.user)
         self.assertEqual(new_post.group, self.group)
 
+    def test_image_is_processed_and_deduplicated(self):
+        """Картинка уменьшается, теряет EXIF и хранится в одном экземпляре."""
+        source = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        Image.new('RGB', (4000, 1000), 'red').save(
+            source, 'JPEG', exif=exif.tobytes()
+        )
+        for text in ('Первый', 'Второй'):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={
+                    'text': text,
+                    'image': SimpleUploadedFile(
+                        'photo.jpg', source.getvalue(), 'image/jpeg'
+                    ),
+                },
+            )
+        first, second = Post.objects.filter(text__in=('Первый', 'Второй'))
+        self.assertEqual(first.image.name, second.image.name)
+        with Image.open(first.image.path) as stored:
+            self.assertEqual(stored.size, (1920, 480))
+            self.assertEqual(len(stored.getexif()), 0)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
     def test_edit_post(self):
         """Валидная форма изменяет пост"""
         new_group = Group.objects.create(
@@ -0,0 +1,96 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts.images import UPLOAD_TO, process_upload
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+FILES = ('posts/aa/used.jpg', 'posts/bb/orphan.jpg', 'cache/cc/thumb.jpg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GcMediaTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        for name in FILES:
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(b'image')
+        user = User.objects.create_user(username='name')
+        Post.objects.create(author=user, text='Пост', image=FILES[0])
+
+    def gc(self, *args):
+        call_command(
+            'gc_media', '--min-age=0', '--max-rate=1000', *args,
+            stdout=io.StringIO()
+        )
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_dry_run_keeps_files(self):
+        """В режиме dry-run файлы не удаляются."""
+        self.gc('--dry-run')
+        for name in FILES:
+            with self.subTest(name=name):
+                self.assertTrue(self.exists(name))
+
+    def test_deletes_only_orphans(self):
+        """Удаляются только файлы, на которые нет ссылок."""
+        self.gc('--batch-size=1')
+        self.assertTrue(self.exists(FILES[0]))
+        self.assertFalse(self.exists(FILES[1]))
+        self.assertFalse(self.exists(FILES[2]))
+
+    def test_keeps_thumbnails_from_kvstore(self):
+        """Миниатюра, записанная в KV-хранилище sorl, не удаляется."""
+        KVStore.objects.create(
+            key=add_prefix(ImageFile(FILES[2], default.storage).key),
+            value='{}',
+        )
+        self.gc()
+        self.assertTrue(self.exists(FILES[2]))
+
+    def test_reused_orphan_is_kept(self):
+        """Повторная загрузка старой сироты освежает её mtime."""
+        source = io.BytesIO()
+        Image.new('RGB', (10, 10), 'red').save(source, 'JPEG')
+
+        def upload():
+            return process_upload(SimpleUploadedFile(
+                'photo.jpg', source.getvalue(), 'image/jpeg'
+            ))
+
+        name = default_storage.save(UPLOAD_TO + upload().name, upload())
+        old = time.time() - 2 * 60 * 60
+        os.utime(default_storage.path(name), (old, old))
+        upload()
+        call_command('gc_media', '--max-rate=0', stdout=io.StringIO())
+        self.assertTrue(self.exists(name))
+
+    def test_negative_max_rate_is_rejected(self):
+        """Отрицательный --max-rate — ошибка команды, а не деление на ноль."""
+        with self.assertRaises(CommandError):
+            self.gc('--max-rate=-1')
@@ -0,0 +1,41 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import LiveServerTestCase, override_settings
+
+from core.loadtest import Stats, VirtualUser, run_stage
+from posts.loadtest import SCENARIOS, login_sessions, seed
+from posts.models import Comment, Post
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LoadTestTests(LiveServerTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_scenarios_run_without_errors(self):
+        """Сценарии прогона проходят против живого сервера без ошибок."""
+        context = seed(users=3, posts=15, groups=2, comments=5)
+        sessions = login_sessions(context['usernames'][:1]) + [None]
+        stats = Stats()
+        users = [
+            VirtualUser(self.live_server_url, stats, key, context)
+            for key in sessions
+        ]
+        for _, scenario, needs_login in SCENARIOS:
+            scenario(users[0])
+            if not needs_login:
+                scenario(users[1])
+        self.assertEqual(Post.objects.count(), 16)
+        self.assertEqual(Comment.objects.count(), 6)
+        run_stage(users, 0.5, SCENARIOS)
+        self.assertEqual(stats.errors, {})
+        names = {row[0] for row in stats.report(1)}
+        self.assertTrue({'index', 'post_create', 'add_comment'} <= names)
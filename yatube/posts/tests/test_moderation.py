@@ -0,0 +1,104 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib import messages
+from django.contrib.admin import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.cards import VERSION_KEY
+from posts.models import Comment, Group, Post
+from posts.moderation import delete_by_author, move_to_group, purge_comments
+
+User = get_user_model()
+
+
+class ModerationTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='Описание'
+        )
+
+    def setUp(self):
+        self.spam = [
+            Post.objects.create(author=self.spammer, text=f'Спам {index}')
+            for index in range(5)
+        ]
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        Comment.objects.create(
+            post=self.spam[0], author=self.user, text='Ответ на спам'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Купи slon.biz'
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+
+    def test_delete_by_author(self):
+        """Удаляются посты и комментарии автора и комментарии к его постам."""
+        progress = list(delete_by_author([self.spammer.pk], chunk_size=2))
+        self.assertIn(('posts', 5), progress)
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Ок']
+        )
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_move_to_group(self):
+        """Посты переносятся пачками, карточки сбрасываются."""
+        key = VERSION_KEY.format('post', self.spam[0].pk)
+        cache.set(key, 'old', None)
+        posts = Post.objects.filter(author=self.spammer)
+        self.assertEqual(
+            list(move_to_group(posts, self.group, chunk_size=2)), [2, 4, 5]
+        )
+        self.assertEqual(self.group.posts.count(), 5)
+        self.assertNotEqual(cache.get(key), 'old')
+
+    def test_purge_comments(self):
+        """Комментарии удаляются по регулярному выражению."""
+        list(purge_comments(r'\w+\.biz'))
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_command(self):
+        """Команда moderate удаляет контент автора и сообщает о прогрессе."""
+        out = StringIO()
+        call_command('moderate', '--delete-author', 'spammer', stdout=out)
+        self.assertIn('posts: 5', out.getvalue())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_admin_move_action(self):
+        """Действие админки переносит выбранные посты в группу."""
+        admin = User.objects.create_superuser('admin', 'a@example.com', 'x')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'move_to_group',
+            'group': self.group.pk,
+            '_selected_action': [post.pk for post in self.spam[:2]],
+        })
+        self.assertEqual(self.group.posts.count(), 2)
+
+    def test_admin_move_action_rejects_invalid_group(self):
+        """С неверной группой действие ничего не меняет."""
+        Post.objects.filter(pk=self.spam[0].pk).update(group=self.group)
+        admin = User.objects.create_superuser('admin', 'a@example.com', 'x')
+        request = RequestFactory().post('/', {
+            'action': 'move_to_group', 'group': 'not-a-group',
+        })
+        request.user = admin
+        post_admin = site._registry[Post]
+        with mock.patch.object(post_admin, 'message_user') as message_user:
+            post_admin.move_to_group(
+                request, Post.objects.filter(pk=self.spam[0].pk)
+            )
+        self.assertEqual(self.group.posts.count(), 1)
+        self.assertEqual(
+            message_user.call_args[1]['level'], messages.ERROR
+        )
@@ -0,0 +1,85 @@
+import datetime as dt
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Notification, Post
+from posts.notifications import mark_all_read, unread_count
+
+User = get_user_model()
+
+
+class NotificationTests(TransactionTestCase):
+    """Кэш счётчика меняется после коммита, поэтому без TestCase."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_comment_and_follow_notify_author(self):
+        """Комментарий и подписка создают уведомления и счётчик."""
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(post=self.post, author=self.author, text='Я')
+        self.assertEqual(
+            list(self.author.notifications.values_list('kind', flat=True)),
+            [Notification.FOLLOW, Notification.COMMENT],
+        )
+        self.assertEqual(unread_count(self.author.pk), 2)
+
+    def test_header_count_is_cached(self):
+        """Шапка берёт счётчик из кэша, не обращаясь к базе."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(unread_count(self.author.pk), 1)
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.author.pk), 2)
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['unread_notifications'], 2)
+
+    def test_rollback_keeps_cached_count(self):
+        """Откат транзакции с уведомлением не меняет счётчик в кэше."""
+        self.assertEqual(unread_count(self.author.pk), 0)
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                Comment.objects.create(
+                    post=self.post, author=self.reader, text='Ок'
+                )
+                raise ValueError
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.author.pk), 0)
+
+    def test_mark_all_read(self):
+        """«Прочитать все» обнуляет счётчик одним UPDATE."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(unread_count(self.author.pk), 1)
+        with self.assertNumQueries(1):
+            mark_all_read(self.author.pk)
+        self.assertEqual(unread_count(self.author.pk), 0)
+        response = self.client.post(reverse('posts:notifications_read'))
+        self.assertRedirects(response, reverse('posts:notifications'))
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertEqual(response.context['unread_notifications'], 1)
+
+    def test_compaction_recounts_unread(self):
+        """Старые уведомления удаляются, счётчик пересчитывается."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        Notification.objects.filter(kind=Notification.FOLLOW).update(
+            created=timezone.now() - dt.timedelta(days=100)
+        )
+        call_command('compact_notifications', stdout=StringIO())
+        self.assertEqual(self.author.notifications.count(), 1)
+        self.assertEqual(unread_count(self.author.pk), 1)
@@ -0,0 +1,128 @@
+import datetime as dt
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.tests.databases import register_database
+from posts import repository
+from posts.archive import archive_posts
+from posts.models import ArchivedComment, ArchivedPost, Comment, Follow, Post
+
+User = get_user_model()
+
+SHARDS = ['default', 'shard_1', 'shard_2']
+
+register_database('shard_1')
+
+
+def make_posts(pks):
+    start = dt.datetime(2023, 1, 1)
+    return [
+        SimpleNamespace(pk=pk, pub_date=start + dt.timedelta(minutes=pk))
+        for pk in pks
+    ]
+
+
+class ShardRoutingTests(TestCase):
+
+    def test_shard_for_author_is_stable(self):
+        """Шард автора определяется стабильно и из списка POSTS_SHARDS."""
+        with override_settings(POSTS_SHARDS=SHARDS):
+            for author_id in range(1, 50):
+                with self.subTest(author_id=author_id):
+                    shard = repository.shard_for_author(author_id)
+                    self.assertIn(shard, SHARDS)
+                    self.assertEqual(
+                        shard, repository.shard_for_author(author_id)
+                    )
+
+    def test_single_shard_returns_queryset(self):
+        """С одним шардом лента остаётся обычным QuerySet."""
+        user = User.objects.create_user(username='author')
+        follower = User.objects.create_user(username='follower')
+        post = Post.objects.create(author=user, text='Тестовый пост')
+        Follow.objects.create(user=follower, author=user)
+        self.assertEqual(list(repository.feed()), [post])
+        self.assertEqual(list(repository.following_posts(follower)), [post])
+        self.assertEqual(repository.get_post_or_404(post.pk), post)
+
+
+class MergedFeedTests(TestCase):
+
+    def test_merge_orders_by_pub_date(self):
+        """Слияние шардов отдаёт посты от новых к старым."""
+        merged = repository.MergedFeed([
+            sorted(make_posts([1, 4, 7]), key=lambda p: -p.pk),
+            sorted(make_posts([2, 5, 8]), key=lambda p: -p.pk),
+            sorted(make_posts([3, 6]), key=lambda p: -p.pk),
+        ])
+        self.assertEqual([p.pk for p in merged[0:3]], [8, 7, 6])
+        self.assertEqual([p.pk for p in merged[3:6]], [5, 4, 3])
+        self.assertEqual(merged[7].pk, 1)
+
+
+@override_settings(POSTS_SHARDS=['default', 'shard_1'])
+class TwoShardsTests(TestCase):
+    databases = {'default', 'shard_1'}
+
+    def setUp(self):
+        # Пользователи реплицируются во все шарды
+        self.author = next(
+            user for user in (
+                User.objects.create_user(username=f'author{number}')
+                for number in range(50)
+            )
+            if repository.shard_for_author(user.pk) == 'shard_1'
+        )
+        self.author.save(using='shard_1')
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_post_and_comment_live_in_author_shard(self):
+        """Пост и комментарий к нему пишутся в шард автора и читаются."""
+        self.client.post(reverse('posts:post_create'), {'text': 'В шарде'})
+        self.assertFalse(Post.objects.using('default').exists())
+        post = Post.objects.using('shard_1').get(text='В шарде')
+        self.assertEqual(repository.get_post_or_404(post.pk), post)
+        self.assertEqual(list(repository.feed()), [post])
+
+        self.client.post(
+            reverse('posts:add_comment', args=(post.pk,)),
+            {'text': 'Комментарий'},
+        )
+        self.assertFalse(Comment.objects.using('default').exists())
+        self.assertEqual(
+            [comment.text for comment in repository.post_comments(post)],
+            ['Комментарий'],
+        )
+
+    def test_ids_do_not_overlap_between_shards(self):
+        """Первые посты двух шардов получают разные id и находятся по ним."""
+        other = next(
+            user for user in (
+                User.objects.create_user(username=f'other{number}')
+                for number in range(50)
+            )
+            if repository.shard_for_author(user.pk) == 'default'
+        )
+        first = repository.save_post(Post(author=other, text='В default'))
+        second = Post.objects.using('shard_1').create(
+            author=self.author, text='В shard_1'
+        )
+        self.assertEqual(first._state.db, 'default')
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(repository.get_post_or_404(first.pk), first)
+        self.assertEqual(repository.get_post_or_404(second.pk), second)
+        for post in (first, second):
+            repository.save_comment(
+                Comment(post=post, author=post.author, text='Комментарий')
+            )
+
+        list(archive_posts(days=0))
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {first.pk, second.pk},
+        )
+        self.assertEqual(ArchivedComment.objects.count(), 2)
@@ -0,0 +1,131 @@
+import datetime as dt
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from posts import feeds
+from posts.models import Post, PostTag
+from posts.tags import tag_page
+
+User = get_user_model()
+
+
+class ScheduledPublishingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.published = Post.objects.create(author=self.author, text='Пост')
+
+    def schedule(self, minutes, text='Отложенный #тег'):
+        return Post.objects.create(
+            author=self.author, text=text, is_published=False,
+            publish_at=timezone.now() + dt.timedelta(minutes=minutes),
+        )
+
+    def publish(self):
+        call_command('publish_scheduled', stdout=StringIO())
+
+    def test_create_with_publish_at(self):
+        """Пост с будущим временем создаётся скрытым и ставит задачу."""
+        publish_at = timezone.localtime() + dt.timedelta(days=1)
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Завтра',
+            'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertRedirects(
+            response, reverse('posts:profile', args=('author',))
+        )
+        post = Post.objects.get(text='Завтра')
+        self.assertFalse(post.is_published)
+        self.assertTrue(
+            Task.objects.filter(name__endswith='publish_scheduled').exists()
+        )
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Вчера',
+            'publish_at': '2000-01-01T10:00',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('publish_at', response.context['schedule_form'].errors)
+        self.assertFalse(Post.objects.filter(text='Вчера').exists())
+
+    def test_scheduled_posts_are_hidden(self):
+        """До публикации пост не виден в лентах, тегах и чужим."""
+        post = self.schedule(minutes=10)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        response = self.client.get(
+            reverse('posts:profile', args=('author',))
+        )
+        self.assertNotIn(post, response.context['page_obj'])
+        self.assertIn(post, response.context['scheduled'])
+        self.assertFalse(PostTag.objects.filter(post=post).exists())
+        url = reverse('posts:post_detail', args=(post.pk,))
+        self.assertEqual(self.client.get(url).status_code, 200)
+        reader = Client()
+        reader.force_login(self.reader)
+        self.assertEqual(reader.get(url).status_code, 404)
+
+    def test_due_posts_are_published(self):
+        """Наступившие посты публикуются, будущие ждут своего времени."""
+        due = self.schedule(minutes=-1)
+        later = self.schedule(minutes=10)
+        version = feeds.state(feeds.index_scope())
+        self.publish()
+        due.refresh_from_db()
+        later.refresh_from_db()
+        self.assertTrue(due.is_published)
+        self.assertGreaterEqual(due.pub_date, due.publish_at)
+        self.assertFalse(later.is_published)
+        self.assertNotEqual(feeds.state(feeds.index_scope()), version)
+        self.assertEqual(list(tag_page('#тег')), [due])
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn(due, response.context['page_obj'])
+
+    def test_one_task_per_publish_time(self):
+        """Посты с одним временем и перенос не плодят задачи."""
+        publish_at = timezone.now() + dt.timedelta(minutes=10)
+        first, second = (
+            Post.objects.create(
+                author=self.author, text=text, is_published=False,
+                publish_at=publish_at,
+            )
+            for text in ('Первый', 'Второй')
+        )
+        tasks = Task.objects.filter(name__endswith='publish_scheduled')
+        self.assertEqual(list(tasks.values_list('run_at', flat=True)),
+                         [publish_at])
+        later = publish_at + dt.timedelta(minutes=5)
+        first.publish_at = later
+        first.save()
+        first.save()
+        self.assertEqual(tasks.count(), 2)
+        second.publish_at = later
+        second.save()
+        self.assertEqual(list(tasks.values_list('run_at', flat=True)),
+                         [later])
+
+    def test_edit_clears_schedule(self):
+        """Без времени публикации отложенный пост публикуется сразу."""
+        post = self.schedule(minutes=10)
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'Сейчас #тег', 'publish_at': ''},
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.is_published)
+        self.assertEqual(list(tag_page('#тег')), [post])
@@ -0,0 +1,161 @@
+import datetime as dt
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import Task
+from posts.models import Group, Post
+from posts.scheduling import publish_due
+from posts.sitemaps import build_sitemaps, refresh_sitemaps
+
+User = get_user_model()
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITEMAP_CHUNK_SIZE=2,
+    SITE_URL='http://testserver',
+)
+class SitemapTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def read(self, name):
+        with gzip.open(os.path.join(TEMP_SITEMAP_ROOT, name)) as file:
+            return file.read().decode()
+
+    def all_urls(self):
+        return ''.join(
+            self.read(name) for name in os.listdir(TEMP_SITEMAP_ROOT)
+            if name.endswith('.gz')
+        )
+
+    def test_chunks_contain_posts_groups_and_authors(self):
+        """Куски содержат ссылки на посты, группы и профили."""
+        call_command('build_sitemaps', stdout=StringIO())
+        urls = self.all_urls()
+        for post in self.posts:
+            self.assertIn(f'http://testserver/posts/{post.pk}/<', urls)
+        self.assertIn('http://testserver/group/group/<', urls)
+        self.assertIn('http://testserver/profile/author/<', urls)
+
+    def test_index_lists_chunks(self):
+        """Индекс ссылается на каждый кусок."""
+        list(build_sitemaps())
+        with open(os.path.join(TEMP_SITEMAP_ROOT, 'sitemap.xml')) as file:
+            index = file.read()
+        chunks = sorted(
+            name for name in os.listdir(TEMP_SITEMAP_ROOT)
+            if name.endswith('.gz')
+        )
+        self.assertTrue(chunks)
+        for name in chunks:
+            self.assertIn(f'http://testserver/sitemaps/{name}<', index)
+
+    def test_update_rebuilds_only_last_chunks(self):
+        """Обновление пересобирает куски, начиная с последнего."""
+        list(build_sitemaps())
+        post = Post.objects.create(author=self.user, text='Новый')
+        rebuilt = [
+            (section, number) for section, number, _ in build_sitemaps()
+            if section == 'posts'
+        ]
+        last = self.posts[-1].pk // 2
+        self.assertEqual(rebuilt[0], ('posts', last))
+        self.assertEqual(rebuilt[-1], ('posts', post.pk // 2))
+        self.assertIn(f'/posts/{post.pk}/<', self.all_urls())
+
+    def test_update_picks_up_scheduled_posts(self):
+        """Опубликованный по расписанию пост попадает в свой кусок."""
+        scheduled = Post.objects.create(
+            author=self.user, text='Отложенный', is_published=False,
+            publish_at=timezone.now() + dt.timedelta(minutes=1),
+        )
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Ещё {number}')
+        list(build_sitemaps())
+        self.assertNotIn(f'/posts/{scheduled.pk}/<', self.all_urls())
+        list(publish_due(now=timezone.now() + dt.timedelta(minutes=2)))
+        list(build_sitemaps())
+        self.assertIn(f'/posts/{scheduled.pk}/<', self.all_urls())
+
+    def test_full_build_drops_deleted(self):
+        """Полная сборка убирает удалённые записи."""
+        list(build_sitemaps())
+        deleted = self.posts[0]
+        deleted.delete()
+        list(build_sitemaps(full=True))
+        self.assertNotIn(f'/posts/{deleted.pk}/<', self.all_urls())
+
+    def test_view_serves_files(self):
+        """Индекс и куски отдаются с кэшированием, чужие имена — 404."""
+        list(build_sitemaps())
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        response = self.client.get(
+            '/sitemap.xml', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        name = f'sitemap-posts-{self.posts[0].pk // 2}.xml.gz'
+        response = self.client.get(f'/sitemaps/{name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        for name in ('manifest.json', 'sitemap-posts-0.xml', '..%2Fsecret'):
+            with self.subTest(name=name):
+                response = self.client.get(f'/sitemaps/{name}')
+                self.assertEqual(response.status_code, 404)
+
+    def test_robots_txt_points_to_sitemap(self):
+        response = self.client.get('/robots.txt')
+        self.assertContains(response, 'Sitemap: http://testserver/sitemap.xml')
+
+
+class RefreshScheduleTests(TransactionTestCase):
+    """Задача ставится после коммита, поэтому без TestCase."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+
+    def refreshes(self):
+        return Task.objects.filter(name=refresh_sitemaps.name).count()
+
+    def test_new_posts_queue_one_refresh(self):
+        """Пачка новых постов ставит одно обновление sitemap."""
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        self.assertEqual(self.refreshes(), 1)
+
+    def test_scheduled_publication_queues_refresh(self):
+        """Публикация по расписанию тоже ставит обновление sitemap."""
+        Post.objects.create(
+            author=self.user, text='Отложенный', is_published=False,
+            publish_at=timezone.now() + dt.timedelta(minutes=1),
+        )
+        self.assertEqual(self.refreshes(), 0)
+        list(publish_due(now=timezone.now() + dt.timedelta(minutes=2)))
+        self.assertEqual(self.refreshes(), 1)
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostTag
+from posts.moderation import delete_posts
+from posts.tags import extract_tags, link_tags, tag_page
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_extract_tags(self):
+        """Хэштеги приводятся к нижнему регистру, упоминания — как есть."""
+        self.assertEqual(
+            extract_tags('#Django и #джанго, спроси @Reader.J. a#b c@d.ru'),
+            {'#django', '#джанго', '@Reader.J'},
+        )
+
+    def test_casefolded_hashtag_fits_column(self):
+        """Хэштег, удлинившийся от casefold, обрезается до длины тега."""
+        tags = extract_tags('#' + 'ß' * 100)
+        self.assertEqual(tags, {'#' + 'ss' * 50})
+        post = Post.objects.create(author=self.author, text='#' + 'ß' * 100)
+        self.assertEqual(
+            list(post.tags.values_list('tag', flat=True)), list(tags)
+        )
+
+    def test_tags_follow_text(self):
+        """Теги пишутся при создании и правке текста поста."""
+        post = Post.objects.create(author=self.author, text='#один #два')
+        self.assertEqual(
+            set(post.tags.values_list('tag', flat=True)), {'#один', '#два'}
+        )
+        post.text = '#два #три'
+        post.save()
+        self.assertEqual(
+            set(post.tags.values_list('tag', flat=True)), {'#два', '#три'}
+        )
+
+    def test_unchanged_text_is_not_parsed(self):
+        """Сохранение без правки текста не трогает таблицу тегов."""
+        post = Post.objects.create(author=self.author, text='#один')
+        post = Post.objects.get(pk=post.pk)
+        with mock.patch('posts.tags.sync_tags') as sync_tags:
+            post.save()
+        sync_tags.assert_not_called()
+
+    def test_keyset_pages(self):
+        """Страницы тега идут по курсору без пропусков и повторов."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'#тег {number}')
+            for number in range(5)
+        ]
+        Post.objects.create(author=self.author, text='без тега')
+        seen = []
+        page = tag_page('#тег', limit=2)
+        while True:
+            seen.extend(post.pk for post in page)
+            if not page.has_next:
+                break
+            page = tag_page('#тег', page.next_cursor, limit=2)
+        self.assertEqual(seen, [post.pk for post in reversed(posts)])
+
+    def test_tag_page_view(self):
+        Post.objects.create(author=self.author, text='Пост про #Django')
+        response = self.client.get(
+            reverse('posts:tag_posts', args=('django',))
+        )
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertContains(
+            response, reverse('posts:tag_posts', args=('django',))
+        )
+
+    def test_mentions_inbox(self):
+        """Во входящих только посты с упоминанием пользователя."""
+        mention = Post.objects.create(
+            author=self.author, text='Привет, @reader!'
+        )
+        Post.objects.create(author=self.author, text='Привет, @readers')
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:mentions'))
+        self.assertEqual(list(response.context['page_obj']), [mention])
+
+    def test_link_tags_escapes_text(self):
+        html = link_tags('<b>#тег</b> & @reader')
+        self.assertIn('&lt;b&gt;<a href="/tags/', html)
+        self.assertIn('&amp; <a href="/profile/reader/">@reader</a>', html)
+
+    def test_fast_delete_removes_tags(self):
+        """Быстрое удаление модерации удаляет и теги постов."""
+        Post.objects.create(author=self.author, text='#спам')
+        list(delete_posts(Post.objects.filter(author=self.author)))
+        self.assertFalse(PostTag.objects.exists())
@@ -149,6 +149,22 @@ class PostPagesTests(TestCase):
             PostPagesTests.post, response_group.context['page_obj']
         )
 
+    def test_post_card_links(self):
+        """Карточка поста ссылается на пост и на его группу."""
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        group_url = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug}
+        )
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.post.author})
+        )
+        self.assertContains(response, detail_url)
+        self.assertContains(response, group_url)
+        response = self.guest_client.get(group_url)
+        self.assertContains(response, detail_url)
+
     def test_cache(self):
         """Проверка работы кэша"""
         response = self.authorized_client.get(
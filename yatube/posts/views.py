@@ -1,25 +1,48 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
+from django.utils.functional import cached_property
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from core.decorators import primary_db
+from core.metrics import Histogram
+
+from . import notifications, repository, tags
+from .forms import CommentForm, PostForm, ScheduleForm
+from .models import ArchivedPost, Follow, Group, Notification
 
 User = get_user_model()
 
 POSTS_LIMIT = 10
 
+PAGINATOR_COUNT = Histogram(
+    'paginator_count_seconds', 'Подсчёт постов для пагинации', ('view',)
+)
+
+
+class TimedPaginator(Paginator):
+    def __init__(self, *args, view='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.view = view
+
+    @cached_property
+    def count(self):
+        with PAGINATOR_COUNT.time(view=self.view):
+            return super().count
+
 
 def paginator(request, posts):
-    paginator = Paginator(posts, POSTS_LIMIT)
+    paginator = TimedPaginator(
+        posts, POSTS_LIMIT, view=request.resolver_match.view_name
+    )
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
 def index(request):
-    posts = Post.objects.all().select_related('author', 'group')
+    posts = repository.feed()
     context = {
         'page_obj': paginator(request, posts),
     }
@@ -28,7 +51,7 @@ def index(request):
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all().select_related('author')
+    posts = repository.feed(group=group)
     context = {
         'group': group,
         'page_obj': paginator(request, posts),
@@ -36,9 +59,31 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def tag_posts(request, tag):
+    context = {
+        'title': f'#{tag}',
+        'page_obj': tags.tag_page(
+            tags.hashtag(tag), request.GET.get('after'), POSTS_LIMIT
+        ),
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
+@login_required
+def mentions(request):
+    context = {
+        'title': 'Упоминания',
+        'page_obj': tags.tag_page(
+            tags.mention(request.user.username), request.GET.get('after'),
+            POSTS_LIMIT
+        ),
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    posts = repository.author_posts(author.id)
     following = (
         request.user.is_authenticated
         and request.user.username != username
@@ -49,53 +94,81 @@ def profile(request, username):
         'author': author,
         'following': following
     }
+    if request.user == author:
+        context['scheduled'] = repository.scheduled_posts(author.id)
     return render(request, 'posts/profile.html', context)
 
 
+def visible_or_404(request, post):
+    """Отложенный пост до публикации видит только его автор."""
+    if getattr(post, 'is_published', True) or request.user == post.author:
+        return post
+    raise Http404('No Post matches the given query.')
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    count_posts = post.author.posts.count()
+    post = visible_or_404(request, repository.get_any_post_or_404(post_id))
+    count_posts = repository.author_posts(post.author_id).count()
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = repository.post_comments(post)
     context = {
         'post': post,
         'count_posts': count_posts,
         'form': form,
         'comments': comments,
+        'is_archived': isinstance(post, ArchivedPost),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@primary_db
 def post_create(request):
     form = PostForm(
         request.POST,
         files=request.FILES or None
     )
+    schedule_form = ScheduleForm(request.POST or None)
     if request.method == 'POST':
-        if form.is_valid():
+        if form.is_valid() and schedule_form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            schedule_form.apply(post)
+            repository.save_post(post)
             return redirect('posts:profile', request.user.username)
-    return render(request, 'posts/create_post.html', {'form': form})
+    context = {
+        'form': form,
+        'schedule_form': schedule_form,
+    }
+    return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+@primary_db
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = repository.get_post_or_404(post_id)
     if request.user == post.author:
         form = PostForm(
             request.POST or None,
             files=request.FILES or None,
             instance=post
         )
-        if form.is_valid():
-            form.save()
+        # Расписание можно менять, пока пост не опубликован
+        schedule_form = None if post.is_published else ScheduleForm(
+            request.POST or None, initial={'publish_at': post.publish_at}
+        )
+        if form.is_valid() and (
+            schedule_form is None or schedule_form.is_valid()
+        ):
+            post = form.save(commit=False)
+            if schedule_form is not None:
+                schedule_form.apply(post)
+            post.save()
             return redirect('posts:post_detail', post.id)
         context = {
             'post': post,
             'form': form,
+            'schedule_form': schedule_form,
             'is_edit': True,
         }
         return render(request, 'posts/create_post.html', context)
@@ -103,20 +176,21 @@ def post_edit(request, post_id):
 
 
 @login_required
+@primary_db
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = visible_or_404(request, repository.get_post_or_404(post_id))
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        repository.save_comment(comment)
     return redirect('posts:post_detail', post_id=post.id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = repository.following_posts(request.user)
     context = {
         'page_obj': paginator(request, posts),
     }
@@ -124,6 +198,7 @@ def follow_index(request):
 
 
 @login_required
+@primary_db
 def profile_follow(request, username):
     author = User.objects.get(username=username)
     user = request.user
@@ -134,7 +209,28 @@ def profile_follow(request, username):
 
 
 @login_required
+@primary_db
 def profile_unfollow(request, username):
     user = request.user
     Follow.objects.filter(user=user, author__username=username).delete()
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
+
+
+@login_required
+def notification_list(request):
+    queryset = Notification.objects.filter(
+        recipient=request.user
+    ).select_related('actor')
+    context = {
+        'page_obj': paginator(request, queryset),
+        'last_read': notifications.last_read(request.user.pk),
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+@require_POST
+@login_required
+@primary_db
+def notifications_read(request):
+    notifications.mark_all_read(request.user.pk)
+    return redirect('posts:notifications')
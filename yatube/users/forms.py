@@ -1,5 +1,9 @@
+from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
+
+from .throttling import is_throttled, record_failure
 
 User = get_user_model()
 
@@ -8,3 +12,33 @@ class CreationForms(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class ThrottledAuthenticationForm(AuthenticationForm):
+    """Вход с ограничением неудачных попыток по IP и имени пользователя.
+
+    Превышение лимита отклоняется до authenticate(), то есть до
+    дорогого хэширования пароля.
+    """
+    throttled_message = 'Слишком много попыток входа. Попробуйте позже.'
+
+    def throttle_scopes(self):
+        username = self.cleaned_data.get('username', '').lower()
+        ip = self.request.META.get('REMOTE_ADDR', '') if self.request else ''
+        return (
+            ('ip', ip, settings.LOGIN_THROTTLE_IP_RATE),
+            ('username', username, settings.LOGIN_THROTTLE_USERNAME_RATE),
+        )
+
+    def clean(self):
+        scopes = self.throttle_scopes()
+        if any(is_throttled(*scope) for scope in scopes):
+            raise forms.ValidationError(
+                self.throttled_message, code='throttled'
+            )
+        try:
+            return super().clean()
+        except forms.ValidationError:
+            for scope in scopes:
+                record_failure(*scope)
+            raise
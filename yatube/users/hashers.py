@@ -0,0 +1,66 @@
+import base64
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """scrypt из hashlib: память-ёмкий хэш без внешних зависимостей.
+
+    Параметры берутся из PASSWORD_SCRYPT_N/R/P и подбираются командой
+    tune_hasher под целевую задержку. Хэши со старыми параметрами или
+    от других хэшеров пересчитываются при следующем входе.
+    """
+    algorithm = 'scrypt'
+    dklen = 64
+
+    @property
+    def params(self):
+        return (
+            settings.PASSWORD_SCRYPT_N,
+            settings.PASSWORD_SCRYPT_R,
+            settings.PASSWORD_SCRYPT_P,
+        )
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        default_n, default_r, default_p = self.params
+        n, r, p = n or default_n, r or default_r, p or default_p
+        hash = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=256 * n * r, dklen=self.dklen,
+        )
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%d$%d$%s$%s' % (self.algorithm, n, r, p, salt, hash)
+
+    def decode(self, encoded):
+        algorithm, n, r, p, salt, hash = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+        return int(n), int(r), int(p), salt, hash
+
+    def verify(self, password, encoded):
+        n, r, p, salt, _ = self.decode(encoded)
+        return constant_time_compare(
+            encoded, self.encode(password, salt, n, r, p)
+        )
+
+    def safe_summary(self, encoded):
+        n, r, p, salt, hash = self.decode(encoded)
+        return OrderedDict([
+            ('algorithm', self.algorithm),
+            ('work factor', n),
+            ('block size', r),
+            ('parallelism', p),
+            ('salt', mask_hash(salt)),
+            ('hash', mask_hash(hash)),
+        ])
+
+    def must_update(self, encoded):
+        return self.decode(encoded)[:3] != self.params
+
+    def harden_runtime(self, password, encoded):
+        pass
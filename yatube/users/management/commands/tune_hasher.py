@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.hashers import ScryptPasswordHasher
+
+
+class Command(BaseCommand):
+    help = 'Подбирает PASSWORD_SCRYPT_N под целевое время хэширования'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms', type=float, default=50,
+            help='Желаемое время одного хэширования, мс'
+        )
+        parser.add_argument(
+            '--max-log2-n', type=int, default=20,
+            help='Верхняя граница перебора: N не больше 2 ** max-log2-n'
+        )
+
+    def measure(self, hasher, n):
+        started = time.perf_counter()
+        hasher.encode('password', hasher.salt(), n=n)
+        return (time.perf_counter() - started) * 1000
+
+    def handle(self, *args, **options):
+        hasher = ScryptPasswordHasher()
+        best = None
+        for log2_n in range(10, options['max_log2_n'] + 1):
+            n = 2 ** log2_n
+            elapsed = min(self.measure(hasher, n) for _ in range(3))
+            self.stdout.write(f'N = 2 ** {log2_n}: {elapsed:.1f} мс')
+            if elapsed > options['target_ms']:
+                break
+            best = log2_n
+        if best is None:
+            self.stdout.write(self.style.WARNING('Цель недостижима'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'PASSWORD_SCRYPT_N = 2 ** {best}  '
+            f'(r = {settings.PASSWORD_SCRYPT_R}, '
+            f'p = {settings.PASSWORD_SCRYPT_P})'
+        ))
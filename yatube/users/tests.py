@@ -1 +1,67 @@
-# Create your tests here.
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class ScryptHasherTests(TestCase):
+
+    def test_new_password_uses_scrypt(self):
+        """Новые пароли хэшируются scrypt."""
+        user = User.objects.create_user(username='name', password='secret')
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertTrue(user.check_password('secret'))
+        self.assertFalse(user.check_password('wrong'))
+
+    def test_old_hash_is_upgraded_on_login(self):
+        """Пароль со старым хэшером пересчитывается при входе."""
+        user = User.objects.create(
+            username='name',
+            password=make_password('secret', hasher='pbkdf2_sha256'),
+        )
+        Client().post(
+            reverse('users:login'),
+            {'username': 'name', 'password': 'secret'}
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP_RATE=(10, 60),
+    LOGIN_THROTTLE_USERNAME_RATE=(3, 60),
+)
+class LoginThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='name', password='secret')
+        self.client = Client()
+
+    def login(self, password, username='name'):
+        return self.client.post(
+            reverse('users:login'),
+            {'username': username, 'password': password}
+        )
+
+    def test_throttled_before_hashing(self):
+        """После лимита неудач вход отклоняется без проверки пароля."""
+        for _ in range(3):
+            self.login('wrong')
+        with mock.patch('users.forms.AuthenticationForm.clean') as clean:
+            response = self.login('secret')
+        clean.assert_not_called()
+        self.assertContains(response, 'Слишком много попыток входа')
+
+    def test_other_username_not_throttled(self):
+        """Лимит по имени пользователя не задевает других."""
+        for _ in range(3):
+            self.login('wrong')
+        User.objects.create_user(username='other', password='secret')
+        response = self.login('secret', username='other')
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,44 @@
+"""Скользящее окно неудачных входов в кэше.
+
+Счётчики двух соседних фиксированных окон дают оценку числа попыток за
+последние window секунд: предыдущее окно берётся с весом оставшейся
+доли. Проверка не трогает базу и выполняется до хэширования пароля.
+"""
+import time
+
+from django.core.cache import cache
+
+KEY = 'login_throttle:{}:{}:{}'
+
+
+def _keys(scope, identity, window, now):
+    bucket = int(now // window)
+    return (
+        KEY.format(scope, identity, bucket),
+        KEY.format(scope, identity, bucket - 1),
+    )
+
+
+def attempts(scope, identity, window, now=None):
+    now = time.time() if now is None else now
+    current, previous = _keys(scope, identity, window, now)
+    counts = cache.get_many([current, previous])
+    elapsed = (now % window) / window
+    return counts.get(current, 0) + counts.get(previous, 0) * (1 - elapsed)
+
+
+def is_throttled(scope, identity, rate, now=None):
+    limit, window = rate
+    return attempts(scope, identity, window, now) >= limit
+
+
+def record_failure(scope, identity, rate, now=None):
+    _, window = rate
+    now = time.time() if now is None else now
+    current, _ = _keys(scope, identity, window, now)
+    # Ключ живёт два окна: он ещё нужен как «предыдущее» окно
+    if not cache.add(current, 1, window * 2):
+        try:
+            cache.incr(current)
+        except ValueError:
+            cache.set(current, 1, window * 2)
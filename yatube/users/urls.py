@@ -6,6 +6,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
 from django.urls import path
 
 from . import views
+from .forms import ThrottledAuthenticationForm
 
 app_name = 'users'
 
@@ -18,7 +19,10 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        LoginView.as_view(
+            template_name='users/login.html',
+            authentication_form=ThrottledAuthenticationForm
+        ),
         name='login'
     ),
     path(
@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '#ymmu(07(l_o2)+xr8bk7$!p=8gg*49bc(yqlifamg$88_(7**'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1')
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -50,11 +50,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PrimaryStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,24 +66,44 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # В продакшене шаблоны и их include компилируются один раз на процесс
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'debug': DEBUG,
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.notifications',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Метрики /metrics (core.metrics). С несколькими процессами-воркерами
+# укажите общий каталог METRICS_DIR: каждый процесс пишет туда снимок
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+THUMBNAIL_BACKEND = 'core.thumbnails.TimedThumbnailBackend'
+
+# Потоки, в которых yatube.asgi выполняет view
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 10))
 
 
 # Database
@@ -92,6 +116,74 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения. Локально реплику изображает второй файл SQLite:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи сессия читает с основной базы
+REPLICA_STICKY_SECONDS = 10
+
+# Шарды постов: посты автора и комментарии к ним лежат в шарде, выбранном
+# по хэшу author_id. Локально шардами служат отдельные файлы SQLite:
+# DATABASES['shard_1'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'db_shard_1.sqlite3'),
+# }
+# POSTS_SHARDS = ['default', 'shard_1']
+POSTS_SHARDS = ['default']
+
+# Архив: посты старше POSTS_ARCHIVE_AFTER_DAYS вместе с комментариями
+# команда archive_posts пачками переносит в базу POSTS_ARCHIVE_DB
+POSTS_ARCHIVE_DB = 'default'
+POSTS_ARCHIVE_AFTER_DAYS = 365
+POSTS_ARCHIVE_BATCH_SIZE = 500
+# Размер пачки UPDATE/DELETE при массовой модерации (posts.moderation)
+MODERATION_CHUNK_SIZE = 1000
+# Уведомления (posts.notifications): сколько дней хранить и сколько
+# секунд держать в кэше счётчик непрочитанных для шапки; прочитанный
+# из базы при промахе счётчик живёт в кэше меньше
+NOTIFICATIONS_KEEP_DAYS = 90
+NOTIFICATIONS_CACHE_TIMEOUT = 60 * 60
+NOTIFICATIONS_MISS_CACHE_TIMEOUT = 60
+# Сколько отложенных постов публиковать одним UPDATE (posts.scheduling)
+SCHEDULED_BATCH_SIZE = 500
+
+
+# Сессии: cached_db читает сессию из кэша, signed_cookies не ходит в базу
+# вовсе (данные сессии целиком лежат в подписанной cookie)
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+
+# Пользователь сессии берётся из кэша, а не из auth_user
+AUTHENTICATION_BACKENDS = ['core.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 60 * 5
+
+
+# Первый хэшер — основной, остальные только для проверки старых паролей:
+# при входе такие пароли прозрачно пересчитываются основным хэшером
+PASSWORD_HASHERS = [
+    'users.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+# Параметры scrypt; подбираются командой tune_hasher
+PASSWORD_SCRYPT_N = 2 ** 14
+PASSWORD_SCRYPT_R = 8
+PASSWORD_SCRYPT_P = 1
+
+# Лимит неудачных входов: (попыток, за секунд)
+LOGIN_THROTTLE_IP_RATE = (20, 60)
+LOGIN_THROTTLE_USERNAME_RATE = (5, 60)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,22 +225,86 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+if not DEBUG:
+    # Хэшированные имена и сжатые копии; создаются командой collectstatic
+    STATICFILES_STORAGE = (
+        'core.storage.CompressedManifestStaticFilesStorage'
+    )
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
+# Письма складываются в очередь и уходят командой send_mail_queue
+EMAIL_BACKEND = 'core.mail.OutboxEmailBackend'
 #  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+OUTBOX_MAX_ATTEMPTS = 5
+# Пауза перед повтором: OUTBOX_RETRY_DELAY * 2 ** попытка секунд
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_CLAIM_TIMEOUT = 60 * 5
+
+# Фоновые задачи core.tasks, выполняет команда run_worker
+TASK_MAX_ATTEMPTS = 5
+# Пауза перед повтором: TASK_RETRY_DELAY * 2 ** попытка секунд
+TASK_RETRY_DELAY = 10
+# Через столько секунд задачу упавшего воркера возьмёт другой
+TASK_CLAIM_TIMEOUT = 60 * 10
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Отдавать MEDIA_URL самим приложением (core.views.serve_media), если
+# перед ним нет отдельного файлового сервера
+SERVE_MEDIA = DEBUG
+
+# Адрес сайта для абсолютных ссылок в sitemap
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+# Готовые sitemap: пишет команда build_sitemaps (см. posts.sitemaps)
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_CHUNK_SIZE = 10000
+# Новые посты попадают в sitemap не позже чем через столько секунд
+SITEMAP_REFRESH_DELAY = 5 * 60
+
+# Загрузки всегда пишутся во временный файл, а не держатся в памяти
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+# Ограничения и размер картинок постов (см. posts.images)
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIZE = (1920, 1920)
 
+# На кэше держатся сессии, пользователи и карточки постов, поэтому в
+# продакшене он должен быть общим для всех воркеров (memcached, redis)
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Сжатые общие страницы: отдельно, чтобы не вытеснять сессии
+    'compression': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compression',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
 }
+
+# Сколько секунд живёт HTML-карточка поста в кэше (см. posts.cards)
+POST_CARD_TIMEOUT = 60 * 60 * 24
+# Сколько секунд живут RSS/Atom и их версии (см. posts.feeds)
+FEEDS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сжатие и минификация ответов (см. core.middleware.CompressionMiddleware)
+HTML_MINIFY = True
+COMPRESSION_MIN_SIZE = 860
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BR_QUALITY = 5
+COMPRESSION_CACHE = 'compression'
+COMPRESSION_CACHE_TIMEOUT = 60 * 5
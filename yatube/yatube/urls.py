@@ -13,10 +13,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics_view, robots_txt, serve_media, serve_sitemap
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
@@ -24,13 +27,29 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics_view, name='metrics'),
+    path('robots.txt', robots_txt, name='robots'),
+    path('sitemap.xml', serve_sitemap, {'name': 'sitemap.xml'},
+         name='sitemap'),
+    re_path(
+        r'^{}(?P<name>[^/]+)$'.format(
+            re.escape(settings.SITEMAP_URL.lstrip('/'))
+        ),
+        serve_sitemap,
+        name='sitemap_chunk',
+    ),
 ]
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if settings.SERVE_MEDIA:
+    media_prefix = re.escape(settings.MEDIA_URL.lstrip('/'))
+    urlpatterns += [
+        re_path(
+            r'^{}(?P<path>.*)$'.format(media_prefix),
+            serve_media,
+            name='media',
+        ),
+    ]